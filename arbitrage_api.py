@@ -0,0 +1,147 @@
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from arbitrage_core import (
+    ODDS_COLUMNS, calculate_stakes, normalize_odds_columns, arbitraj_hesapla_batch,
+    optimize_rounded_stakes, round_batch_stakes
+)
+
+# Headless JSON API for the arbitrage calculator, so bots can request stake splits without Streamlit.
+#
+#   POST /stakes        {"balance": 100, "risk_percentage": 20, "odds_a": 1.75, "odds_b": 2.5, "odds_c": null}
+#   POST /stakes/batch  {"balance": 100, "risk_percentage": 20, "rows": [[1.75, 2.5], [3.1, 3.6, 3.9]]}
+#                       -> {"columns": [...], "data": [[...], ...]}
+#   GET  /health
+#
+# Both POST routes accept an optional "rounding": {"increments": 1, "min_stakes": 0, "max_stakes": 500}.
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+
+
+def _rounding_options(payload):
+    rounding = payload.get('rounding')
+    if not rounding:
+        return None
+    if not isinstance(rounding, dict):
+        raise ValueError("rounding must be an object")
+    return {
+        'increments': float(rounding.get('increments', 1.0)),
+        'min_stakes': float(rounding.get('min_stakes', 0.0)),
+        'max_stakes': float(rounding.get('max_stakes') or np.inf)
+    }
+
+
+def _json_value(value):
+    if isinstance(value, (np.generic,)):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+# Single opportunity: same numbers the Streamlit calculator shows. odds_c is optional (null or 0 for a
+# two-way market); odds that are given must be above 1.0, the rows /stakes/batch marks valid.
+def handle_stakes(payload):
+    odds = [float(payload['odds_a']), float(payload['odds_b']), float(payload.get('odds_c') or 0)]
+    given = {'odds_a': odds[0], 'odds_b': odds[1], **({'odds_c': odds[2]} if odds[2] else {})}
+    for name, value in given.items():
+        if not value > 1.0:
+            raise ValueError(f"{name} must be greater than 1.0")
+    result = calculate_stakes(float(payload['balance']), float(payload['risk_percentage']), *odds)
+    rounding = _rounding_options(payload)
+    if rounding:
+        stakes, profit = optimize_rounded_stakes([odds], result['Budget'], **rounding)
+        result['Rounded Bets'] = [_json_value(s) for s in stakes[0]]
+        result['Rounded Profit'] = _json_value(profit[0])
+    return {k: _json_value(v) for k, v in result.items()}
+
+
+# Many opportunities in one vectorized pass; rows are [a, b, c?] lists or objects with odds columns
+def handle_batch(payload):
+    rows = payload['rows']
+    if not isinstance(rows, list):
+        raise ValueError("rows must be a list")
+    if rows and isinstance(rows[0], dict):
+        odds_df = normalize_odds_columns(pd.DataFrame(rows))
+    else:
+        odds_df = pd.DataFrame([list(r) + [None] * (3 - len(r)) for r in rows], columns=ODDS_COLUMNS)
+    balance, risk_percentage = float(payload['balance']), float(payload['risk_percentage'])
+    results = arbitraj_hesapla_batch(odds_df, balance, risk_percentage)
+    rounding = _rounding_options(payload)
+    if rounding:
+        results = round_batch_stakes(results, balance * (risk_percentage / 100), **rounding)
+    # Already-encoded JSON ({"columns": [...], "data": [[...], ...]}); pandas serializes NaN as null
+    return results.to_json(orient='split', index=False, double_precision=15)
+
+
+ROUTES = {
+    '/stakes': handle_stakes,
+    '/stakes/batch': handle_batch
+}
+
+
+class ArbitrageRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every keep-alive
+    # response stalls on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body):
+        data = (body if isinstance(body, str) else json.dumps(body)).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok'})
+        else:
+            self._send(404, {'error': f"Unknown route {self.path}"})
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if handler is None:
+            self._send(404, {'error': f"Unknown route {self.path}"})
+            return
+        try:
+            payload = json.loads(body or b'{}')
+            if not isinstance(payload, dict):
+                raise ValueError("Request body must be a JSON object")
+            self._send(200, handler(payload))
+        except KeyError as e:
+            self._send(400, {'error': f"Missing field: {e.args[0]}"})
+        except (TypeError, ValueError, ZeroDivisionError) as e:
+            self._send(400, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return ThreadingHTTPServer((host, port), ArbitrageRequestHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless arbitrage calculator API")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    server = create_server(args.host, args.port)
+    logger.info(f"Arbitrage API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
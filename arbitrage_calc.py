@@ -1,72 +1,51 @@
 import streamlit as st
 import pandas as pd
+import io
 import uuid
-import json
-import os
-
-# Directory to store user data
-DATA_DIR = "user_data"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
-
-# File path for user data
-def get_user_file(username):
-    return os.path.join(DATA_DIR, f"{username}_history.json")
-
-# Load user bet history and balance
-def load_user_history(username):
-    user_file = get_user_file(username)
-    if os.path.exists(user_file):
-        with open(user_file, 'r') as f:
-            data = json.load(f)
-            return pd.DataFrame(data['bet_history']), data['balance']
-    return pd.DataFrame(columns=[
-        'Bet ID', 'Date', 'Team A Odds', 'Team B Odds', 'Team C Odds', 
-        'Bet A', 'Bet B', 'Bet C', 'Total Profit', 'ROI', 'Balance After'
-    ]), 100.0
-
-# Save user bet history and balance
-def save_user_history(username):
-    user_file = get_user_file(username)
-    data = {
-        'bet_history': st.session_state.bet_history.to_dict('records'),
-        'balance': st.session_state.balance
-    }
-    with open(user_file, 'w') as f:
-        json.dump(data, f)
+from arbitrage_core import (
+    calculate_stakes, read_odds_file, arbitraj_hesapla_batch, summarize_batch, optimize_rounded_stakes, round_batch_stakes
+)
+from arbitrage_portfolio import empty_portfolio, update_portfolio, points_frame, outcomes_frame
+from arbitrage_storage import (
+    init_db, load_user, load_portfolio, record_bet, reset_balance, update_bet, empty_history, BalanceConflictError
+)
 
-# Arbitrage calculation function
-def arbitraj_hesapla(balance, risk_percentage, oran_a, oran_b, oran_c=None, track=False):
-    butce = balance * (risk_percentage / 100)
-    
-    if oran_c and oran_c > 1.0:
-        arbitraj_orani = (1 / oran_a) + (1 / oran_b) + (1 / oran_c)
-    else:
-        arbitraj_orani = (1 / oran_a) + (1 / oran_b)
-    
-    bahis_a = (butce / oran_a) / arbitraj_orani
-    bahis_b = (butce / oran_b) / arbitraj_orani
-    bahis_c = (butce / oran_c) / arbitraj_orani if oran_c and oran_c > 1.0 else 0
-    
-    kazanc_a = bahis_a * oran_a
-    kar_a = kazanc_a - butce
-    kazanc_b = bahis_b * oran_b
-    kar_b = kazanc_b - butce
-    if oran_c and oran_c > 1.0:
-        kazanc_c = bahis_c * oran_c
-        kar_c = kazanc_c - butce
-        total_profit = min(kar_a, kar_b, kar_c)
-        total_payout = max(kazanc_a, kazanc_b, kazanc_c)
-    else:
-        total_profit = min(kar_a, kar_b)
-        total_payout = max(kazanc_a, kazanc_b)
+# Shared SQLite storage; every Streamlit process serving the app uses the same database.
+# Cached as a resource so the schema check runs once per process instead of on every rerun.
+@st.cache_resource(show_spinner=False)
+def init_storage():
+    init_db()
+
+init_storage()
 
-    roi = (total_profit / butce) * 100 if butce > 0 else 0
+# Load ledger, balance and portfolio analytics for the logged-in user
+def load_user_session(username):
+    st.session_state.bet_history, st.session_state.balance, st.session_state.version = load_user(username)
+    st.session_state.portfolio, st.session_state.portfolio_points = load_portfolio(username)
+
+# Reload the session from storage after another tab or worker changed the balance
+def reload_user_session():
+    load_user_session(st.session_state.username)
+    st.warning("Your balance was changed in another session. History has been reloaded, please try again.")
+
+# Batch evaluation of an uploaded or pasted odds file, cached so unrelated reruns skip it
+@st.cache_data(show_spinner="Evaluating odds...")
+def evaluate_batch(data, file_name, balance, risk_percentage, rounding=None):
+    results = arbitraj_hesapla_batch(read_odds_file(data, file_name), balance, risk_percentage)
+    if rounding:
+        results = round_batch_stakes(results, balance * (risk_percentage / 100), **rounding)
+    return results
+
+# Arbitrage calculation function
+def arbitraj_hesapla(balance, risk_percentage, oran_a, oran_b, oran_c=None, track=False, rounding=None):
+    stakes = calculate_stakes(balance, risk_percentage, oran_a, oran_b, oran_c)
+    butce = stakes['Budget']
+    bahis_a, bahis_b, bahis_c = stakes['Bet A'], stakes['Bet B'], stakes['Bet C'] or 0
+    total_profit, total_payout, roi = stakes['Total Profit'], stakes['Total Payout'], stakes['ROI']
 
     if track:
-        st.session_state.balance += total_profit
         bet_id = str(uuid.uuid4())[:8]
-        new_bet = pd.DataFrame([{
+        new_bet = {
             'Bet ID': bet_id,
             'Date': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
             'Team A Odds': oran_a,
@@ -76,11 +55,19 @@ def arbitraj_hesapla(balance, risk_percentage, oran_a, oran_b, oran_c=None, trac
             'Bet B': bahis_b,
             'Bet C': bahis_c if oran_c > 1.0 else None,
             'Total Profit': total_profit,
-            'ROI': roi,
-            'Balance After': st.session_state.balance
-        }])
-        st.session_state.bet_history = pd.concat([st.session_state.bet_history, new_bet], ignore_index=True)
-        save_user_history(st.session_state.username)
+            'ROI': roi
+        }
+        try:
+            st.session_state.balance, st.session_state.version = record_bet(
+                st.session_state.username, new_bet, st.session_state.version
+            )
+        except BalanceConflictError:
+            reload_user_session()
+            return
+        new_bet['Balance After'] = st.session_state.balance
+        st.session_state.bet_history = pd.concat([st.session_state.bet_history, pd.DataFrame([new_bet])], ignore_index=True)
+        st.session_state.portfolio, point = update_portfolio(st.session_state.portfolio, new_bet)
+        st.session_state.portfolio_points = pd.concat([st.session_state.portfolio_points, points_frame([point])], ignore_index=True)
 
     st.subheader("Results")
     st.write(f"**Bet on Team A**: ${bahis_a:.2f}")
@@ -88,6 +75,13 @@ def arbitraj_hesapla(balance, risk_percentage, oran_a, oran_b, oran_c=None, trac
     if oran_c and oran_c > 1.0:
         st.write(f"**Bet on Team C**: ${bahis_c:.2f}")
     st.write(f"**Total profit**: ${total_profit:.2f}")
+    if rounding and stakes['Arbitrage']:
+        rounded, rounded_profit = optimize_rounded_stakes([[oran_a, oran_b, oran_c]], butce, **rounding)
+        if pd.notnull(rounded_profit[0]):
+            placeable = ", ".join(f"Team {team} ${stake:.2f}" for team, stake in zip("ABC", rounded[0]) if pd.notnull(stake))
+            st.write(f"**Placeable stakes**: {placeable} (guaranteed profit ${rounded_profit[0]:.2f})")
+        else:
+            st.warning("No placeable stakes fit the rounding step and stake limits within this budget.")
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -101,11 +95,11 @@ def arbitraj_hesapla(balance, risk_percentage, oran_a, oran_b, oran_c=None, trac
 if 'username' not in st.session_state:
     st.session_state.username = None
 if 'bet_history' not in st.session_state or 'balance' not in st.session_state:
-    st.session_state.bet_history = pd.DataFrame(columns=[
-        'Bet ID', 'Date', 'Team A Odds', 'Team B Odds', 'Team C Odds', 
-        'Bet A', 'Bet B', 'Bet C', 'Total Profit', 'ROI', 'Balance After'
-    ])
+    st.session_state.bet_history = empty_history()
     st.session_state.balance = 100.0
+    st.session_state.version = 0
+    st.session_state.portfolio = empty_portfolio()
+    st.session_state.portfolio_points = points_frame([])
 
 st.set_page_config(page_title="Arbitrage Calculator", layout="wide")
 st.title("Arbitrage Calculator")
@@ -121,7 +115,7 @@ with st.form(key="username_form"):
     submit_username = st.form_submit_button("Login")
     if submit_username and username:
         st.session_state.username = username
-        st.session_state.bet_history, st.session_state.balance = load_user_history(username)
+        load_user_session(username)
         st.success(f"Logged in as {username}!")
 
 # Main app for logged-in users
@@ -131,13 +125,16 @@ if st.session_state.username:
         starting_balance = st.number_input("Starting Balance", min_value=0.0, step=1.0, value=st.session_state.balance, format="%.2f")
         submit_balance = st.form_submit_button("Update Starting Balance")
         if submit_balance:
-            st.session_state.balance = starting_balance
-            st.session_state.bet_history = pd.DataFrame(columns=[
-                'Bet ID', 'Date', 'Team A Odds', 'Team B Odds', 'Team C Odds', 
-                'Bet A', 'Bet B', 'Bet C', 'Total Profit', 'ROI', 'Balance After'
-            ])
-            save_user_history(st.session_state.username)
-            st.success("Starting balance updated!")
+            try:
+                st.session_state.balance, st.session_state.version = reset_balance(
+                    st.session_state.username, starting_balance, st.session_state.version
+                )
+                st.session_state.bet_history = empty_history()
+                st.session_state.portfolio = empty_portfolio()
+                st.session_state.portfolio_points = points_frame([])
+                st.success("Starting balance updated!")
+            except BalanceConflictError:
+                reload_user_session()
 
     st.write(f"**Current Balance**: ${st.session_state.balance:.2f}")
 
@@ -151,12 +148,83 @@ if st.session_state.username:
     with col4:
         risk_percentage = st.number_input("Risk percentage of balance", min_value=0.0, max_value=100.0, step=0.1, value=20.0, format="%.1f", key="logged_risk")
 
+    with st.expander("Stake Rounding & Bookmaker Limits"):
+        use_rounding = st.checkbox("Round stakes to placeable amounts", key="use_rounding")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            rounding_step = st.number_input("Rounding step", min_value=0.01, step=0.01, value=1.0, format="%.2f", key="rounding_step")
+        with col2:
+            min_stake = st.number_input("Minimum stake", min_value=0.0, step=0.5, value=0.0, format="%.2f", key="min_stake")
+        with col3:
+            max_stake = st.number_input("Maximum stake (0 = no limit)", min_value=0.0, step=10.0, value=0.0, format="%.2f", key="max_stake")
+    rounding = {
+        'increments': rounding_step,
+        'min_stakes': min_stake,
+        'max_stakes': max_stake if max_stake > 0 else float('inf')
+    } if use_rounding else None
+
     if st.button("Calculate", key="arbitraj_hesapla"):
-        arbitraj_hesapla(st.session_state.balance, risk_percentage, oran_a, oran_b, oran_c, track=True)
+        arbitraj_hesapla(st.session_state.balance, risk_percentage, oran_a, oran_b, oran_c, track=True, rounding=rounding)
+
+    st.subheader("Batch Evaluation")
+    st.markdown("Upload a CSV/Parquet file or paste rows with `Team A Odds`, `Team B Odds` and optional `Team C Odds` columns. Stakes use your current balance and the risk percentage above.")
+    batch_file = st.file_uploader("Odds file", type=['csv', 'parquet'], key="batch_file")
+    batch_text = st.text_area("Or paste CSV rows (with header)", height=150, key="batch_text")
+    if batch_file is not None or batch_text.strip():
+        if batch_file is not None:
+            batch_data, batch_name = batch_file.getvalue(), batch_file.name
+        else:
+            batch_data, batch_name = batch_text.encode(), "pasted.csv"
+        try:
+            batch_results = evaluate_batch(batch_data, batch_name, st.session_state.balance, risk_percentage, rounding)
+        except (ValueError, ImportError) as e:
+            st.error(f"Could not evaluate odds file: {e}")
+        else:
+            summary = summarize_batch(batch_results)
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Rows", value=summary['rows'], delta=f"{summary['invalid']} invalid" if summary['invalid'] else None, delta_color="off")
+            with col2:
+                st.metric("Arbitrage Opportunities", value=summary['arbitrage'])
+            with col3:
+                st.metric("Combined Profit", value=f"${summary['total_profit']:.2f}")
+            with col4:
+                st.metric("Best ROI", value=f"{summary['best_roi']:.2f}%")
+            arbitrage_only = st.checkbox("Show arbitrage opportunities only", value=True, key="batch_arbitrage_only")
+            shown = batch_results[batch_results['Arbitrage']] if arbitrage_only else batch_results
+            st.dataframe(shown.sort_values('ROI', ascending=False), use_container_width=True)
+            if batch_name.lower().endswith('.parquet'):
+                buffer = io.BytesIO()
+                batch_results.to_parquet(buffer, index=False)
+                st.download_button("Download Results", buffer.getvalue(), file_name="arbitrage_results.parquet", mime="application/octet-stream")
+            else:
+                st.download_button("Download Results", batch_results.to_csv(index=False), file_name="arbitrage_results.csv", mime="text/csv")
 
     st.subheader("Bet History")
     st.dataframe(st.session_state.bet_history, use_container_width=True)
 
+    portfolio = st.session_state.portfolio
+    if portfolio['bets']:
+        st.subheader("Portfolio Analytics")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Profit", value=f"${portfolio['total_profit']:.2f}")
+        with col2:
+            st.metric("Overall ROI", value=f"{portfolio['total_profit'] / portfolio['total_staked'] * 100 if portfolio['total_staked'] > 0 else 0:.2f}%")
+        with col3:
+            st.metric("Max Drawdown", value=f"${portfolio['max_drawdown']:.2f}")
+        with col4:
+            st.metric("Rolling ROI", value=f"{st.session_state.portfolio_points['Rolling ROI'].iloc[-1]:.2f}%")
+        curve = st.session_state.portfolio_points.set_index('Bet #')
+        st.line_chart(curve[['Cumulative Profit', 'Drawdown']])
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("**Rolling ROI (%)**")
+            st.line_chart(curve['Rolling ROI'])
+        with col2:
+            st.write("**Profit by Number of Outcomes**")
+            st.bar_chart(outcomes_frame(portfolio)['Profit'])
+
     st.subheader("Edit Bet History")
     bet_id_to_edit = st.selectbox("Select Bet ID to Edit", st.session_state.bet_history['Bet ID'].tolist(), key="edit_bet_id")
     if bet_id_to_edit:
@@ -172,20 +240,30 @@ if st.session_state.username:
             new_profit = st.number_input("Total Profit", value=float(bet['Total Profit']), format="%.2f")
             submit_edit = st.form_submit_button("Update Bet")
             if submit_edit:
-                old_profit = bet['Total Profit']
-                st.session_state.balance = st.session_state.balance - old_profit + new_profit
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Date'] = new_date
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Team A Odds'] = new_oran_a
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Team B Odds'] = new_oran_b
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Team C Odds'] = new_oran_c if new_oran_c > 1.0 else None
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Bet A'] = new_bet_a
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Bet B'] = new_bet_b
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Bet C'] = new_bet_c if new_oran_c > 1.0 else None
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Total Profit'] = new_profit
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'Balance After'] = st.session_state.balance
-                st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, 'ROI'] = (new_profit / (new_bet_a + new_bet_b + (new_bet_c if new_oran_c > 1.0 else 0))) * 100 if (new_bet_a + new_bet_b + (new_bet_c if new_oran_c > 1.0 else 0)) > 0 else 0
-                save_user_history(st.session_state.username)
-                st.success("Bet updated successfully!")
+                new_bet_total = new_bet_a + new_bet_b + (new_bet_c if new_oran_c > 1.0 else 0)
+                changes = {
+                    'Date': new_date,
+                    'Team A Odds': new_oran_a,
+                    'Team B Odds': new_oran_b,
+                    'Team C Odds': new_oran_c if new_oran_c > 1.0 else None,
+                    'Bet A': new_bet_a,
+                    'Bet B': new_bet_b,
+                    'Bet C': new_bet_c if new_oran_c > 1.0 else None,
+                    'Total Profit': new_profit,
+                    'ROI': (new_profit / new_bet_total) * 100 if new_bet_total > 0 else 0
+                }
+                try:
+                    st.session_state.balance, st.session_state.version = update_bet(
+                        st.session_state.username, bet_id_to_edit, changes, st.session_state.version
+                    )
+                except BalanceConflictError:
+                    reload_user_session()
+                else:
+                    changes['Balance After'] = st.session_state.balance
+                    for column, value in changes.items():
+                        st.session_state.bet_history.loc[st.session_state.bet_history['Bet ID'] == bet_id_to_edit, column] = value
+                    st.session_state.portfolio, st.session_state.portfolio_points = load_portfolio(st.session_state.username)
+                    st.success("Bet updated successfully!")
 
 # Simple arbitrage calculator on login page
 st.subheader("Quick Arbitrage Calculator (No Login Required)")
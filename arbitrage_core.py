@@ -0,0 +1,256 @@
+import io
+import numpy as np
+import pandas as pd
+
+# Odds columns of a batch file; Team C Odds is optional and <= 1.0 means a two-way market
+ODDS_COLUMNS = ['Team A Odds', 'Team B Odds', 'Team C Odds']
+ODDS_COLUMN_ALIASES = {
+    'odds_a': 'Team A Odds', 'team_a_odds': 'Team A Odds', 'a': 'Team A Odds',
+    'odds_b': 'Team B Odds', 'team_b_odds': 'Team B Odds', 'b': 'Team B Odds',
+    'odds_c': 'Team C Odds', 'team_c_odds': 'Team C Odds', 'c': 'Team C Odds'
+}
+
+
+# Arbitrage stake split for a single opportunity; Team C is only used when its odds are above 1.0
+def calculate_stakes(balance, risk_percentage, oran_a, oran_b, oran_c=None):
+    butce = balance * (risk_percentage / 100)
+    three_way = bool(oran_c and oran_c > 1.0)
+
+    if three_way:
+        arbitraj_orani = (1 / oran_a) + (1 / oran_b) + (1 / oran_c)
+    else:
+        arbitraj_orani = (1 / oran_a) + (1 / oran_b)
+
+    bahis_a = (butce / oran_a) / arbitraj_orani
+    bahis_b = (butce / oran_b) / arbitraj_orani
+    bahis_c = (butce / oran_c) / arbitraj_orani if three_way else 0
+
+    kazanc_a = bahis_a * oran_a
+    kar_a = kazanc_a - butce
+    kazanc_b = bahis_b * oran_b
+    kar_b = kazanc_b - butce
+    if three_way:
+        kazanc_c = bahis_c * oran_c
+        kar_c = kazanc_c - butce
+        total_profit = min(kar_a, kar_b, kar_c)
+        total_payout = max(kazanc_a, kazanc_b, kazanc_c)
+    else:
+        total_profit = min(kar_a, kar_b)
+        total_payout = max(kazanc_a, kazanc_b)
+
+    roi = (total_profit / butce) * 100 if butce > 0 else 0
+    return {
+        'Budget': butce,
+        'Arbitrage': arbitraj_orani < 1,
+        'Bet A': bahis_a,
+        'Bet B': bahis_b,
+        'Bet C': bahis_c if three_way else None,
+        'Total Payout': total_payout,
+        'Total Profit': total_profit,
+        'ROI': roi
+    }
+
+
+# Read a CSV or Parquet odds file (path, bytes or file-like) into a DataFrame with ODDS_COLUMNS
+def read_odds_file(source, file_name=None):
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    name = (file_name or getattr(source, 'name', None) or str(source)).lower()
+    if name.endswith('.parquet') or name.endswith('.pq'):
+        df = pd.read_parquet(source)
+    else:
+        df = pd.read_csv(source, sep=None, engine='python')
+    return normalize_odds_columns(df)
+
+
+# Map accepted column aliases onto ODDS_COLUMNS, adding an empty Team C column for two-way rows
+def normalize_odds_columns(df):
+    df = df.rename(columns=lambda c: ODDS_COLUMN_ALIASES.get(str(c).strip().lower(), str(c).strip()))
+    if df.columns.duplicated().any():
+        raise ValueError(f"Duplicate odds columns: {', '.join(df.columns[df.columns.duplicated()])}")
+    missing = [c for c in ODDS_COLUMNS[:2] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    if 'Team C Odds' not in df.columns:
+        df['Team C Odds'] = np.nan
+    return df
+
+
+# Vectorized arbitrage stake calculation over every row of an odds DataFrame
+def arbitraj_hesapla_batch(odds_df, balance, risk_percentage):
+    butce = balance * (risk_percentage / 100)
+    oran_a = pd.to_numeric(odds_df['Team A Odds'], errors='coerce').to_numpy(dtype=float)
+    oran_b = pd.to_numeric(odds_df['Team B Odds'], errors='coerce').to_numpy(dtype=float)
+    if 'Team C Odds' in odds_df:
+        oran_c = pd.to_numeric(odds_df['Team C Odds'], errors='coerce').to_numpy(dtype=float)
+    else:
+        oran_c = np.full(len(odds_df), np.nan)
+
+    three_way = np.nan_to_num(oran_c) > 1.0
+    valid = (oran_a > 1.0) & (oran_b > 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        arbitraj_orani = 1 / oran_a + 1 / oran_b + np.where(three_way, 1 / oran_c, 0.0)
+        bahis_a = (butce / oran_a) / arbitraj_orani
+        bahis_b = (butce / oran_b) / arbitraj_orani
+        bahis_c = np.where(three_way, (butce / oran_c) / arbitraj_orani, np.nan)
+        total_payout = butce / arbitraj_orani
+    total_profit = total_payout - butce
+    roi = (total_profit / butce) * 100 if butce > 0 else np.zeros(len(odds_df))
+
+    results = odds_df.copy()
+    results['Team C Odds'] = np.where(three_way, oran_c, np.nan)
+    results['Valid'] = valid
+    results['Arbitrage'] = valid & (arbitraj_orani < 1)
+    results['Margin %'] = (1 - arbitraj_orani) * 100
+    results['Bet A'] = bahis_a
+    results['Bet B'] = bahis_b
+    results['Bet C'] = bahis_c
+    results['Total Payout'] = total_payout
+    results['Total Profit'] = total_profit
+    results['ROI'] = roi
+    invalid_columns = ['Margin %', 'Bet A', 'Bet B', 'Bet C', 'Total Payout', 'Total Profit', 'ROI']
+    results.loc[~valid, invalid_columns] = np.nan
+    return results
+
+
+# Aggregate figures for a batch evaluation
+def summarize_batch(results):
+    arbs = results[results['Arbitrage']]
+    return {
+        'rows': len(results),
+        'invalid': int((~results['Valid']).sum()),
+        'arbitrage': len(arbs),
+        'total_profit': float(arbs['Total Profit'].sum()),
+        'best_roi': float(arbs['ROI'].max()) if len(arbs) else 0.0
+    }
+
+
+# Lattice offsets, in rounding increments, tried around the floor of each ideal stake
+ROUNDING_OFFSETS = np.arange(-4, 4)
+# Lower binding stakes scanned per step once the ones around the ideal split have been tried, and
+# the most steps taken (the scan then stops at ROUNDING_SCAN_BLOCK * ROUNDING_SCAN_STEPS increments)
+ROUNDING_SCAN_BLOCK = 8
+ROUNDING_SCAN_STEPS = 32
+ROUNDING_CHUNK_ROWS = 50000
+
+
+# Pick bookmaker-placeable stakes (multiples of each outcome's increment, within min/max limits)
+# that maximize the guaranteed profit without exceeding the budget. odds is (rows, outcomes);
+# outcomes with odds <= 1.0 or NaN are skipped. Rows that are not an arbitrage (implied probabilities
+# summing to 1 or more) are left unrounded (NaN).
+#
+# The guaranteed payout is set by one binding outcome, and given that payout every other outcome
+# should get the smallest placeable stake that still covers it. So instead of enumerating the
+# full rounded-stake lattice, each lattice stake near the ideal split (plus the minimum stake) is
+# tried as the binding one, and all rows and candidates are scored at once with NumPy. A payout P
+# guarantees at most P * margin, so lower binding stakes only need scanning while their payout is
+# above best profit / margin; rows still short of that bound scan down in blocks. The scan is capped,
+# so time stays bounded when rounding wipes out a thin margin (the bound then never closes); a better
+# split more than ROUNDING_SCAN_BLOCK * ROUNDING_SCAN_STEPS increments below the ideal one is missed.
+def optimize_rounded_stakes(odds, budget, increments=1.0, min_stakes=0.0, max_stakes=np.inf):
+    odds = np.atleast_2d(np.asarray(odds, dtype=float))
+    n, k = odds.shape
+    budget = np.broadcast_to(np.asarray(budget, dtype=float), (n,))
+    increments = np.broadcast_to(np.asarray(increments, dtype=float), (k,))
+    min_stakes = np.broadcast_to(np.asarray(min_stakes, dtype=float), (k,))
+    max_stakes = np.broadcast_to(np.asarray(max_stakes, dtype=float), (k,))
+
+    active = np.nan_to_num(odds) > 1.0
+    margin = 1 - np.where(active, 1 / np.where(active, odds, 1.0), 0.0).sum(axis=1)
+    arb_rows = np.flatnonzero(active[:, :2].all(axis=1) & (margin > 0))
+
+    stakes = np.full((n, k), np.nan)
+    profit = np.full(n, np.nan)
+    for start in range(0, len(arb_rows), ROUNDING_CHUNK_ROWS):
+        rows = arb_rows[start:start + ROUNDING_CHUNK_ROWS]
+        stakes[rows], profit[rows] = _optimize_chunk(odds[rows], budget[rows], margin[rows], increments, min_stakes, max_stakes)
+    return stakes, profit
+
+
+# Best split per row among the binding payout levels (rows, levels); NaN levels are skipped. Works
+# one outcome at a time on (rows, levels) arrays: reductions over a 2-3 long outcome axis are slow.
+def _best_split(levels, odds_f, active, budget, increments, low, high):
+    staked = np.zeros(levels.shape)
+    returns = np.full(levels.shape, np.inf)
+    feasible = ~np.isnan(levels)
+    outcome_stakes = []
+    for i in range(odds_f.shape[1]):
+        # Smallest placeable stake on this outcome covering each payout level
+        stakes = np.ceil(levels / (odds_f[:, i:i + 1] * increments[i]) - 1e-9) * increments[i]
+        stakes = np.where(active[:, i:i + 1], np.maximum(stakes, low[i]), 0.0)
+        staked += stakes
+        returns = np.minimum(returns, np.where(active[:, i:i + 1], stakes * odds_f[:, i:i + 1], np.inf))
+        feasible &= ~active[:, i:i + 1] | (stakes <= high[i])
+        outcome_stakes.append(stakes)
+    feasible &= staked <= budget[:, None] + 1e-9
+    scores = np.where(feasible, returns - staked, -np.inf)
+
+    best = scores.argmax(axis=1)
+    rows = np.arange(len(levels))
+    return np.stack([stakes[rows, best] for stakes in outcome_stakes], axis=1), scores[rows, best]
+
+
+def _optimize_chunk(odds, budget, margin, increments, min_stakes, max_stakes):
+    n, k = odds.shape
+    active = np.nan_to_num(odds) > 1.0
+    odds_f = np.where(active, odds, 1.0)
+    low = np.maximum(np.ceil(min_stakes / increments), 1) * increments
+    high = np.floor(max_stakes / increments) * increments
+
+    # Ideal split of the budget as in arbitraj_hesapla, with the payout pulled inside the stake limits
+    inv = np.where(active, 1 / odds_f, 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payout = budget / inv
+    payout = np.minimum(payout, np.where(active, high * odds_f, np.inf).min(axis=1))
+    payout = np.maximum(payout, np.where(active, low * odds_f, 0.0).max(axis=1))
+    ideal = np.where(active, payout[:, None] / odds_f, 0.0)
+
+    # Candidate binding stakes per outcome: lattice points around the ideal stake and the minimum stake
+    units = np.floor(ideal / increments)
+    lattice = units[:, :, None] + ROUNDING_OFFSETS[None, None, :]
+    lattice = np.concatenate([lattice * increments[None, :, None], np.broadcast_to(low[None, :, None], (n, k, 1))], axis=2)
+    lattice = np.clip(lattice, low[None, :, None], high[None, :, None])
+    levels = np.where(active[:, :, None], lattice * odds_f[:, :, None], np.nan).reshape(n, -1)
+    best_stakes, best_profit = _best_split(levels, odds_f, active, budget, increments, low, high)
+
+    # Lower binding stakes, block by block, for the rows where one could still beat the best split
+    pending = np.arange(n)
+    below = ROUNDING_OFFSETS[0] - 1 - np.arange(ROUNDING_SCAN_BLOCK)
+    for _ in range(ROUNDING_SCAN_STEPS):
+        # Levels fall within a block, so a row whose highest stakes cannot win is done
+        top = (units[pending] + below[0]) * increments
+        bound = best_profit[pending] / margin[pending]
+        reachable = active[pending] & (top >= low - 1e-9) & (top * odds_f[pending] > bound[:, None])
+        pending = pending[reachable.any(axis=1)]
+        if not len(pending):
+            break
+        block = (units[pending, :, None] + below[None, None, :]) * increments[None, :, None]
+        levels = block * odds_f[pending, :, None]
+        bound = best_profit[pending] / margin[pending]
+        candidate = active[pending, :, None] & (block >= low[None, :, None] - 1e-9) & (levels > bound[:, None, None])
+        stakes, scores = _best_split(np.where(candidate, levels, np.nan).reshape(len(pending), -1),
+                                     odds_f[pending], active[pending], budget[pending], increments, low, high)
+        better = scores > best_profit[pending]
+        best_stakes[pending[better]] = stakes[better]
+        best_profit[pending[better]] = scores[better]
+        below = below - ROUNDING_SCAN_BLOCK
+
+    found = np.isfinite(best_profit)
+    best_stakes[~found] = np.nan
+    best_profit[~found] = np.nan
+    best_stakes[~active] = np.nan
+    return best_stakes, best_profit
+
+
+# Append placeable rounded stakes and their guaranteed profit to batch results
+def round_batch_stakes(results, budget, increments=1.0, min_stakes=0.0, max_stakes=np.inf):
+    odds = results[ODDS_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    stakes, profit = optimize_rounded_stakes(odds, budget, increments, min_stakes, max_stakes)
+    results = results.copy()
+    results['Rounded Bet A'] = stakes[:, 0]
+    results['Rounded Bet B'] = stakes[:, 1]
+    results['Rounded Bet C'] = stakes[:, 2]
+    results['Rounded Profit'] = profit
+    results['Rounded ROI'] = profit / np.nansum(stakes, axis=1) * 100
+    results.loc[~results['Valid'], ['Rounded Bet A', 'Rounded Bet B', 'Rounded Bet C', 'Rounded Profit', 'Rounded ROI']] = np.nan
+    return results
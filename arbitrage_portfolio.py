@@ -0,0 +1,89 @@
+import pandas as pd
+
+# Number of most recent bets in the rolling ROI window
+ROLLING_WINDOW = 20
+
+# Columns of the per-bet analytics curve
+POINT_COLUMNS = ['Bet #', 'Bet ID', 'Date', 'Cumulative Profit', 'Drawdown', 'Rolling ROI']
+
+
+# Running aggregates over a bet ledger; plain dict so it can be stored as JSON next to the ledger
+def empty_portfolio():
+    return {
+        'bets': 0,
+        'total_profit': 0.0,
+        'total_staked': 0.0,
+        'peak_profit': 0.0,
+        'max_drawdown': 0.0,
+        'window': [],
+        'window_profit': 0.0,
+        'window_staked': 0.0,
+        'by_outcomes': {}
+    }
+
+
+def _bet_stake(bet):
+    return sum(float(bet.get(col) or 0) for col in ('Bet A', 'Bet B', 'Bet C') if pd.notnull(bet.get(col)))
+
+
+def _bet_outcomes(bet):
+    oran_c = bet.get('Team C Odds')
+    return '3' if oran_c is not None and pd.notnull(oran_c) and oran_c > 1.0 else '2'
+
+
+# Fold one bet into the running aggregates in O(1); returns the new state and its curve point
+def update_portfolio(state, bet):
+    state = dict(state, window=list(state['window']), by_outcomes=dict(state['by_outcomes']))
+    profit = float(bet.get('Total Profit') or 0)
+    stake = _bet_stake(bet)
+
+    state['bets'] += 1
+    state['total_profit'] += profit
+    state['total_staked'] += stake
+    state['peak_profit'] = max(state['peak_profit'], state['total_profit'])
+    drawdown = state['peak_profit'] - state['total_profit']
+    state['max_drawdown'] = max(state['max_drawdown'], drawdown)
+
+    state['window'].append([profit, stake])
+    state['window_profit'] += profit
+    state['window_staked'] += stake
+    if len(state['window']) > ROLLING_WINDOW:
+        old_profit, old_stake = state['window'].pop(0)
+        state['window_profit'] -= old_profit
+        state['window_staked'] -= old_stake
+    rolling_roi = state['window_profit'] / state['window_staked'] * 100 if state['window_staked'] > 0 else 0.0
+
+    outcomes = _bet_outcomes(bet)
+    count, total = state['by_outcomes'].get(outcomes, [0, 0.0])
+    state['by_outcomes'][outcomes] = [count + 1, total + profit]
+
+    point = {
+        'Bet #': state['bets'],
+        'Bet ID': bet.get('Bet ID'),
+        'Date': bet.get('Date'),
+        'Cumulative Profit': state['total_profit'],
+        'Drawdown': drawdown,
+        'Rolling ROI': rolling_roi
+    }
+    return state, point
+
+
+# Full recompute from a ledger; only needed when a past bet is edited or a legacy file is imported
+def rebuild_portfolio(bets):
+    state = empty_portfolio()
+    points = []
+    for bet in bets:
+        state, point = update_portfolio(state, bet)
+        points.append(point)
+    return state, points
+
+
+def points_frame(points):
+    return pd.DataFrame(points, columns=POINT_COLUMNS)
+
+
+def outcomes_frame(state):
+    return pd.DataFrame(
+        [(f"{k}-way", v[0], v[1]) for k, v in sorted(state['by_outcomes'].items())],
+        columns=['Outcomes', 'Bets', 'Profit']
+    ).set_index('Outcomes')
@@ -0,0 +1,262 @@
+import sqlite3
+import json
+import os
+from contextlib import contextmanager
+import pandas as pd
+from arbitrage_portfolio import empty_portfolio, update_portfolio, rebuild_portfolio, points_frame
+
+# Directory and SQLite database shared by every Streamlit process serving the calculator
+DATA_DIR = "user_data"
+DB_PATH = os.path.join(DATA_DIR, "arbitrage.db")
+DEFAULT_BALANCE = 100.0
+
+# Bet history columns shown in the app, mapped to their SQLite column names
+HISTORY_COLUMNS = {
+    'Bet ID': 'bet_id',
+    'Date': 'date',
+    'Team A Odds': 'odds_a',
+    'Team B Odds': 'odds_b',
+    'Team C Odds': 'odds_c',
+    'Bet A': 'bet_a',
+    'Bet B': 'bet_b',
+    'Bet C': 'bet_c',
+    'Total Profit': 'total_profit',
+    'ROI': 'roi',
+    'Balance After': 'balance_after'
+}
+
+
+# Raised when the balance changed in another tab or worker since the session last loaded it
+class BalanceConflictError(Exception):
+    pass
+
+
+def empty_history():
+    return pd.DataFrame(columns=list(HISTORY_COLUMNS))
+
+
+def get_connection(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+# Run a block inside a write transaction; BEGIN IMMEDIATE takes the write lock up front
+# so read-check-write sequences cannot interleave between processes
+@contextmanager
+def transaction(db_path=DB_PATH):
+    conn = get_connection(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+# Initialize SQLite database
+def init_db(db_path=DB_PATH):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    bet_columns = ",\n".join(f"{col} {'TEXT' if col in ('bet_id', 'date') else 'REAL'}"
+                             for col in HISTORY_COLUMNS.values() if col != 'bet_id')
+    conn = get_connection(db_path)
+    try:
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                balance REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS bets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                bet_id TEXT NOT NULL UNIQUE,
+                {bet_columns}
+            );
+            CREATE INDEX IF NOT EXISTS idx_bets_username ON bets (username, id);
+            CREATE TABLE IF NOT EXISTS portfolio (
+                username TEXT PRIMARY KEY,
+                state TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS portfolio_points (
+                username TEXT NOT NULL,
+                bet_num INTEGER NOT NULL,
+                bet_id TEXT,
+                date TEXT,
+                cum_profit REAL,
+                drawdown REAL,
+                rolling_roi REAL,
+                PRIMARY KEY (username, bet_num)
+            );
+        """)
+    finally:
+        conn.close()
+
+
+# Legacy per-user JSON file written by earlier versions of the calculator
+def get_legacy_user_file(username, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"{username}_history.json")
+
+
+def _insert_bet(conn, username, bet):
+    columns = ['username'] + list(HISTORY_COLUMNS.values())
+    values = [username] + [_to_sql(bet.get(name)) for name in HISTORY_COLUMNS]
+    conn.execute(
+        f"INSERT INTO bets ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        values
+    )
+
+
+def _to_sql(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _require_version(conn, username, expected_version):
+    row = conn.execute("SELECT balance, version FROM users WHERE username = ?", (username,)).fetchone()
+    if row is None or row[1] != expected_version:
+        raise BalanceConflictError(f"Balance for {username} was modified by another session")
+    return row[0]
+
+
+def _bump_balance(conn, username, balance):
+    conn.execute("UPDATE users SET balance = ?, version = version + 1 WHERE username = ?", (balance, username))
+    return conn.execute("SELECT version FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+# Portfolio analytics are kept next to the ledger and updated in the same transaction as each bet
+def _load_portfolio_state(conn, username):
+    row = conn.execute("SELECT state FROM portfolio WHERE username = ?", (username,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _save_portfolio_state(conn, username, state):
+    conn.execute(
+        "INSERT INTO portfolio (username, state) VALUES (?, ?) "
+        "ON CONFLICT(username) DO UPDATE SET state = excluded.state",
+        (username, json.dumps(state))
+    )
+
+
+def _insert_point(conn, username, point):
+    conn.execute(
+        "INSERT OR REPLACE INTO portfolio_points VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (username, point['Bet #'], point['Bet ID'], point['Date'],
+         point['Cumulative Profit'], point['Drawdown'], point['Rolling ROI'])
+    )
+
+
+def _rebuild_portfolio(conn, username):
+    rows = conn.execute(
+        f"SELECT {', '.join(HISTORY_COLUMNS.values())} FROM bets WHERE username = ? ORDER BY id", (username,)
+    ).fetchall()
+    state, points = rebuild_portfolio([dict(zip(HISTORY_COLUMNS, row)) for row in rows])
+    conn.execute("DELETE FROM portfolio_points WHERE username = ?", (username,))
+    for point in points:
+        _insert_point(conn, username, point)
+    _save_portfolio_state(conn, username, state)
+    return state
+
+
+# Create the user on first login, importing a legacy JSON history if one exists
+def _ensure_user(conn, username, data_dir):
+    if conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+        return
+    balance = DEFAULT_BALANCE
+    bets = []
+    legacy_file = get_legacy_user_file(username, data_dir)
+    if os.path.exists(legacy_file):
+        with open(legacy_file, 'r') as f:
+            data = json.load(f)
+        balance = data.get('balance', DEFAULT_BALANCE)
+        bets = data.get('bet_history', [])
+    conn.execute("INSERT INTO users (username, balance, version) VALUES (?, ?, 0)", (username, balance))
+    for bet in bets:
+        _insert_bet(conn, username, bet)
+    _rebuild_portfolio(conn, username)
+
+
+# Load user bet history, balance and balance version
+def load_user(username, db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        _ensure_user(conn, username, os.path.dirname(db_path) or ".")
+        balance, version = conn.execute(
+            "SELECT balance, version FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        rows = conn.execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS.values())} FROM bets WHERE username = ? ORDER BY id",
+            (username,)
+        ).fetchall()
+    history = pd.DataFrame(rows, columns=list(HISTORY_COLUMNS)) if rows else empty_history()
+    return history, balance, version
+
+
+# Load the running portfolio aggregates and the per-bet analytics curve
+def load_portfolio(username, db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        state = _load_portfolio_state(conn, username)
+        if state is None:
+            state = _rebuild_portfolio(conn, username)
+        rows = conn.execute(
+            "SELECT bet_num, bet_id, date, cum_profit, drawdown, rolling_roi FROM portfolio_points "
+            "WHERE username = ? ORDER BY bet_num",
+            (username,)
+        ).fetchall()
+    return state, points_frame(rows)
+
+
+# Append a bet and apply its profit to the balance; fails if the balance moved since expected_version
+def record_bet(username, bet, expected_version, db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        balance = _require_version(conn, username, expected_version) + bet['Total Profit']
+        version = _bump_balance(conn, username, balance)
+        bet = dict(bet, **{'Balance After': balance})
+        _insert_bet(conn, username, bet)
+        state = _load_portfolio_state(conn, username)
+        if state is None:
+            _rebuild_portfolio(conn, username)
+        else:
+            state, point = update_portfolio(state, bet)
+            _save_portfolio_state(conn, username, state)
+            _insert_point(conn, username, point)
+    return balance, version
+
+
+# Reset the starting balance and clear the bet history
+def reset_balance(username, balance, expected_version, db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        _require_version(conn, username, expected_version)
+        conn.execute("DELETE FROM bets WHERE username = ?", (username,))
+        conn.execute("DELETE FROM portfolio_points WHERE username = ?", (username,))
+        _save_portfolio_state(conn, username, empty_portfolio())
+        version = _bump_balance(conn, username, balance)
+    return balance, version
+
+
+# Update fields of an existing bet, moving the balance by the change in its profit
+def update_bet(username, bet_id, changes, expected_version, db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        balance = _require_version(conn, username, expected_version)
+        row = conn.execute(
+            "SELECT total_profit FROM bets WHERE username = ? AND bet_id = ?", (username, bet_id)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Bet {bet_id} not found for {username}")
+        balance = balance - (row[0] or 0) + changes.get('Total Profit', row[0] or 0)
+        version = _bump_balance(conn, username, balance)
+        changes = dict(changes, **{'Balance After': balance})
+        assignments = ", ".join(f"{HISTORY_COLUMNS[name]} = ?" for name in changes)
+        conn.execute(
+            f"UPDATE bets SET {assignments} WHERE username = ? AND bet_id = ?",
+            [_to_sql(v) for v in changes.values()] + [username, bet_id]
+        )
+        _rebuild_portfolio(conn, username)
+    return balance, version
@@ -0,0 +1,114 @@
+import argparse
+import numpy as np
+import pandas as pd
+from candle_resample import resample_ohlcv, timeframe_ms
+from candle_store import CandleStore, MAX_FETCH
+from confluence import (SCAN_TIMEFRAMES, SIGNAL_THRESHOLD, STOP_ATR, TARGET_ATR, TIMEFRAME_WEIGHTS,
+                        confluence_history, score_history)
+from indicators import StreamingIndicators
+
+TRADE_COLUMNS = ['entry_time', 'side', 'entry', 'stop', 'target', 'exit_time', 'exit', 'outcome', 'r_multiple', 'return_pct']
+
+
+# Trades taken on the scanner's rule: when the score is past +/-threshold go long/short at that
+# candle's close, with the stop STOP_ATR and the target TARGET_ATR ATRs away. One position at a time;
+# it exits on the first later candle whose range reaches the stop or the target, filled at that level
+# (or at the open when the candle gapped past it). If one candle reaches both, the stop counts as hit
+# first. A position still open at the end is closed at the last close with outcome 'open'.
+def backtest(df, score, atr, threshold=SIGNAL_THRESHOLD, stop_atr=STOP_ATR, target_atr=TARGET_ATR):
+    open_, high, low, close = (df[c].to_numpy(dtype=float) for c in ('open', 'high', 'low', 'close'))
+    score = np.asarray(score, dtype=float)
+    atr = np.asarray(atr, dtype=float)
+    signals = np.flatnonzero((np.abs(score) > threshold) & (atr > 0))
+    trades = []
+    free_from = 0
+    while True:
+        k = np.searchsorted(signals, free_from)
+        if k == len(signals):
+            break
+        i = signals[k]
+        side = 1 if score[i] > 0 else -1
+        entry = close[i]
+        stop = entry - side * stop_atr * atr[i]
+        target = entry + side * target_atr * atr[i]
+        if side > 0:
+            stop_hit, target_hit = low[i + 1:] <= stop, high[i + 1:] >= target
+        else:
+            stop_hit, target_hit = high[i + 1:] >= stop, low[i + 1:] <= target
+        hit = np.flatnonzero(stop_hit | target_hit)
+        if hit.size:
+            j = i + 1 + hit[0]
+            outcome = 'stop' if stop_hit[hit[0]] else 'target'
+            level = stop if outcome == 'stop' else target
+            gapped = (open_[j] - level) * side * (1 if outcome == 'target' else -1) > 0
+            exit_price = open_[j] if gapped else level
+        else:
+            j = len(close) - 1
+            outcome = 'open'
+            exit_price = close[j]
+        trades.append((df.index[i], 'long' if side > 0 else 'short', entry, stop, target, df.index[j], exit_price,
+                       outcome, side * (exit_price - entry) / (stop_atr * atr[i]), side * (exit_price / entry - 1) * 100))
+        if outcome == 'open':
+            break
+        # A signal on the exit candle may open the next trade at its close
+        free_from = j
+    return pd.DataFrame(trades, columns=TRADE_COLUMNS)
+
+
+def summarize(trades):
+    r = trades['r_multiple']
+    losses = -r[r < 0].sum()
+    return {
+        'trades': len(trades),
+        'win rate %': (trades['outcome'] == 'target').mean() * 100 if len(trades) else float('nan'),
+        'avg R': r.mean() if len(trades) else float('nan'),
+        'total R': r.sum(),
+        'profit factor': r[r > 0].sum() / losses if losses else float('nan'),
+        'return %': ((1 + trades['return_pct'] / 100).prod() - 1) * 100
+    }
+
+
+# Confluence score per candle of the lowest timeframe in `frames` ({timeframe: OHLCV candles}) and
+# that timeframe's candles and ATR, ready for backtest()
+def confluence_backtest_inputs(frames, weights=TIMEFRAME_WEIGHTS):
+    timeframes = sorted(frames, key=timeframe_ms)
+    histories = {}
+    for tf in timeframes:
+        indicators = StreamingIndicators().run(frames[tf])
+        histories[tf] = score_history(tf, frames[tf], indicators, weights)
+        if tf == timeframes[0]:
+            atr = indicators['ATR']
+    return frames[timeframes[0]], confluence_history(histories), atr
+
+
+def load_frames(symbol, timeframes, csv_path=None):
+    if csv_path:
+        # Candles of the lowest timeframe from a CSV file, the others resampled from them
+        base_tf = min(timeframes, key=timeframe_ms)
+        base = pd.read_csv(csv_path, parse_dates=['timestamp'], index_col='timestamp')
+        return {tf: base if tf == base_tf else resample_ohlcv(base, tf) for tf in timeframes}
+    store = CandleStore()
+    for tf in timeframes:
+        store.get(symbol, tf, MAX_FETCH, derive=False)
+    return {tf: store.load(symbol, tf) for tf in timeframes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the confluence scanner's signals with ATR stops and targets")
+    parser.add_argument("--symbol", default="BTC/USDT", help="pair whose stored candles are used")
+    parser.add_argument("--csv", help="CSV of the lowest timeframe's candles (timestamp,open,high,low,close,volume) "
+                                      "to use instead of the candle store")
+    parser.add_argument("--timeframes", nargs="+", default=SCAN_TIMEFRAMES, help="timeframes scored")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[SIGNAL_THRESHOLD], help="score thresholds")
+    parser.add_argument("--weights", nargs="+", metavar="TF=WEIGHT", default=[],
+                        help="timeframe weights overriding the scanner's (e.g. 1d=0.5 4h=0.3 1h=0.2)")
+    args = parser.parse_args()
+
+    weights = dict(TIMEFRAME_WEIGHTS, **{tf: float(w) for tf, w in (item.split("=") for item in args.weights)})
+    frames = load_frames(args.symbol, args.timeframes, args.csv)
+    df, score, atr = confluence_backtest_inputs(frames, weights)
+    print(f"{args.csv or args.symbol}: {len(df):,} candles from {df.index[0]} to {df.index[-1]}")
+    for threshold in args.thresholds:
+        summary = summarize(backtest(df, score, atr, threshold))
+        print(f"  threshold {threshold:<5g} " + "  ".join(f"{k} {v:,}" if isinstance(v, int) else f"{k} {v:,.2f}"
+                                                     for k, v in summary.items()))
@@ -0,0 +1,76 @@
+import argparse
+import http.client
+import json
+import threading
+import time
+import numpy as np
+from arbitrage_api import create_server, handle_batch
+from arbitrage_core import calculate_stakes
+
+# Throughput of the headless arbitrage API for single and batched stake requests.
+# Run from the repository root: python -m benchmarks.bench_arbitrage_api
+
+
+def _random_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    odds = rng.uniform(1.5, 4.0, (n, 3)).round(2)
+    odds[::2, 2] = 0
+    return odds.tolist()
+
+
+def _report(name, count, unit, elapsed):
+    print(f"{name:<34} {count:>8} {unit:<9} {elapsed:8.3f}s  {count / elapsed:12,.0f} {unit}/s")
+
+
+def bench_in_process(rows):
+    start = time.perf_counter()
+    for a, b, c in rows:
+        calculate_stakes(100.0, 20.0, a, b, c)
+    _report("in-process calculate_stakes", len(rows), "calls", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    handle_batch({'balance': 100.0, 'risk_percentage': 20.0, 'rows': rows})
+    _report("in-process handle_batch", len(rows), "rows", time.perf_counter() - start)
+
+
+def _post(conn, path, body):
+    # Encoded to bytes so http.client sends headers and body in a single write
+    conn.request("POST", path, json.dumps(body).encode(), {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{path} returned {response.status}")
+
+
+def bench_http(port, single_rows, batch_rows, batch_size, rounding):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    extra = {'rounding': {'increments': 1.0}} if rounding else {}
+
+    start = time.perf_counter()
+    for a, b, c in single_rows:
+        _post(conn, "/stakes", dict(extra, balance=100.0, risk_percentage=20.0, odds_a=a, odds_b=b, odds_c=c))
+    _report("HTTP /stakes (keep-alive)", len(single_rows), "requests", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(batch_rows), batch_size):
+        _post(conn, "/stakes/batch", dict(extra, balance=100.0, risk_percentage=20.0, rows=batch_rows[i:i + batch_size]))
+    _report(f"HTTP /stakes/batch ({batch_size} rows/request)", len(batch_rows), "rows", time.perf_counter() - start)
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the headless arbitrage API")
+    parser.add_argument("--requests", type=int, default=2000, help="number of single-opportunity requests")
+    parser.add_argument("--batch-rows", type=int, default=100000, help="total rows sent through /stakes/batch")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per batch request")
+    parser.add_argument("--rounding", action="store_true", help="include the stake rounding optimizer")
+    args = parser.parse_args()
+
+    server = create_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        bench_in_process(_random_rows(args.requests))
+        bench_http(server.server_address[1], _random_rows(args.requests, seed=1),
+                   _random_rows(args.batch_rows, seed=2), args.batch_size, args.rounding)
+    finally:
+        server.shutdown()
@@ -0,0 +1,78 @@
+import argparse
+import random
+import statistics
+import time
+from groq_analysis import odds_fingerprint
+from odds_delta import OddsDeltaStore
+from odds_fixtures import synthetic_events
+from odds_summary import build_match_summary
+from odds_table import OddsTable, odds_display_frame
+from odds_value import find_value_bets
+
+# Hot paths of the betting agent per odds payload (normalization, value bets, deltas) and per page
+# view (odds table prep, fingerprint, LLM summary) on synthetic events, no API keys needed.
+# Run from the repository root: python -m benchmarks.bench_odds_pipeline
+
+MARKETS = ['h2h', 'spreads', 'totals']
+
+
+def _timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+# The same events with roughly a tenth of the prices moved, as the next poll would return them
+def _moved(events, seed=1):
+    rng = random.Random(seed)
+    return [dict(e, bookmakers=[dict(b, markets=[dict(m, outcomes=[
+        dict(o, price=round(o['price'] + rng.choice([-0.05, 0.05]), 2)) if rng.random() < 0.1 else o
+        for o in m['outcomes']]) for m in b['markets']]) for b in e['bookmakers']]) for e in events]
+
+
+def bench(n, bookmakers, repeat, sample):
+    events = synthetic_events(n, bookmakers=bookmakers)
+    moved = _moved(events)
+    results = {}
+
+    results['normalize'], table = _timed(lambda: OddsTable(events), repeat)
+    results['value bets (all events)'], value_bets = _timed(lambda: find_value_bets(table.frame), repeat)
+
+    def apply_deltas():
+        store = OddsDeltaStore()
+        store.apply("soccer_epl", events, 1.0, MARKETS)
+        start = time.perf_counter()
+        store.apply("soccer_epl", moved, 2.0, MARKETS)
+        return time.perf_counter() - start
+    results['delta apply (next poll)'] = statistics.median(apply_deltas() for _ in range(repeat))
+
+    # Per-view stages: median over a sample of events
+    picked = events[:: max(1, n // sample)][:sample]
+
+    def per_event(func):
+        return statistics.median(_timed(lambda: func(event), 1)[0] for event in picked)
+
+    results['event slice'] = per_event(lambda e: table.event(e['id'], MARKETS))
+    results['odds table prep'] = per_event(lambda e: odds_display_frame(table.event(e['id'], MARKETS), {}))
+    results['odds fingerprint'] = per_event(lambda e: odds_fingerprint(table.event(e['id'], MARKETS)))
+    results['match summary'] = per_event(lambda e: build_match_summary(
+        e, "EPL", table.event(e['id'], MARKETS), value_bets[value_bets['event_id'] == e['id']]))
+    return len(table), results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the odds pipeline of the betting agent")
+    parser.add_argument("--events", type=int, nargs="+", default=[10, 100, 1000, 10000], help="event counts")
+    parser.add_argument("--bookmakers", type=int, default=8, help="bookmakers per event")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per payload stage (median reported)")
+    parser.add_argument("--sample", type=int, default=20, help="events sampled for per-view stages")
+    args = parser.parse_args()
+
+    for n in args.events:
+        rows, results = bench(n, args.bookmakers, args.repeat, args.sample)
+        print(f"{n} events, {rows:,} price rows")
+        for stage, elapsed in results.items():
+            print(f"  {stage:<26} {elapsed * 1000:10.2f} ms")
@@ -0,0 +1,141 @@
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+from candle_patterns import CANDLE_PATTERNS, PATTERN_FUNCTIONS, cdl_patterns
+
+# Checks the NumPy candle patterns on a fixed random OHLC sample against candle-by-candle transcriptions
+# of their sources (TA-Lib's C code for engulfing / hammer / inverted hammer with its default candle
+# settings, pandas_ta's own cdl_doji). pandas_ta and TA-Lib are not dependencies of the app, so by
+# default only these transcriptions are checked; with pandas_ta and TA-Lib installed
+# (pip install pandas-ta TA-Lib) the patterns are also compared with ta.cdl_pattern itself, and
+# --require-library makes a missing library an error instead of skipping that comparison.
+# Exits with status 1 on any mismatch (or a missing library with --require-library).
+# Run from the repository root: python -m benchmarks.validate_candle_patterns
+
+
+def _body(o, c, i):
+    return abs(c[i] - o[i])
+
+
+def _range(h, l, i):
+    return h[i] - l[i]
+
+
+def _upper_shadow(o, h, c, i):
+    return h[i] - max(o[i], c[i])
+
+
+def _lower_shadow(o, l, c, i):
+    return min(o[i], c[i]) - l[i]
+
+
+# TA-Lib's CDLHAMMER / CDLINVERTEDHAMMER: BodyShort and ShadowVeryShort average the 10 candles before
+# the current one, Near the 5 candles before the previous one
+def ref_hammer(o, h, l, c, inverted=False):
+    out = np.zeros(len(c), dtype=int)
+    for i in range(11, len(c)):
+        body_short = sum(_body(o, c, k) for k in range(i - 10, i)) / 10
+        shadow_very_short = 0.1 * sum(_range(h, l, k) for k in range(i - 10, i)) / 10
+        if inverted:
+            long_shadow, short_shadow = _upper_shadow(o, h, c, i), _lower_shadow(o, l, c, i)
+            position = max(o[i], c[i]) < min(o[i - 1], c[i - 1])
+        else:
+            long_shadow, short_shadow = _lower_shadow(o, l, c, i), _upper_shadow(o, h, c, i)
+            near = 0.2 * sum(_range(h, l, k) for k in range(i - 6, i - 1)) / 5
+            position = min(o[i], c[i]) <= l[i - 1] + near
+        if _body(o, c, i) < body_short and long_shadow > _body(o, c, i) and short_shadow < shadow_very_short and position:
+            out[i] = 100
+    return out
+
+
+# TA-Lib's CDLENGULFING
+def ref_engulfing(o, h, l, c):
+    out = np.zeros(len(c), dtype=int)
+    for i in range(2, len(c)):
+        white = c[i] >= o[i] and c[i - 1] < o[i - 1] and \
+            ((c[i] >= o[i - 1] and o[i] < c[i - 1]) or (c[i] > o[i - 1] and o[i] <= c[i - 1]))
+        black = c[i] < o[i] and c[i - 1] >= o[i - 1] and \
+            ((o[i] >= c[i - 1] and c[i] < o[i - 1]) or (o[i] > c[i - 1] and c[i] <= o[i - 1]))
+        if white or black:
+            color = 1 if c[i] >= o[i] else -1
+            out[i] = color * (100 if o[i] != c[i - 1] and c[i] != o[i - 1] else 80)
+    return out
+
+
+# pandas_ta's cdl_doji with its defaults (length 10, factor 10, non_zero_range on body and range)
+def ref_doji(o, h, l, c):
+    eps = sys.float_info.epsilon
+    body = pd.Series(c) - pd.Series(o)
+    body = (body + eps if body.eq(0).any() else body).abs()
+    hl_range = pd.Series(h) - pd.Series(l)
+    hl_range = (hl_range + eps if hl_range.eq(0).any() else hl_range).abs()
+    return np.where(body < 0.1 * hl_range.rolling(10, min_periods=10).mean(), 100, 0)
+
+
+REFERENCES = {
+    'doji': ref_doji,
+    'engulfing': ref_engulfing,
+    'hammer': ref_hammer,
+    'invertedhammer': lambda o, h, l, c: ref_hammer(o, h, l, c, inverted=True)
+}
+
+
+# Random-walk candles rounded to cents, with many small bodies, equal open / previous close ties and
+# candles without one or both shadows, so every branch of the patterns is reached
+def sample_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    prev_close = np.r_[close[0], close[:-1]]
+    open_ = prev_close.copy()
+    small = rng.random(n) < 0.3
+    open_[small] = close[small] * (1 + rng.normal(0, 0.0005, small.sum()))
+    open_, close = np.round(open_, 2), np.round(close, 2)
+    upper = np.round(np.abs(rng.normal(0, 0.004, n)) * close * (rng.random(n) < 0.7), 2)
+    lower = np.round(np.abs(rng.normal(0, 0.004, n)) * close * (rng.random(n) < 0.7), 2)
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + upper,
+                         'low': np.minimum(open_, close) - lower, 'close': close, 'volume': 1.0},
+                        index=pd.date_range('2024-01-01', periods=n, freq='h'))
+
+
+def validate(df, require_library=False):
+    o, h, l, c = (df[col].to_numpy(dtype=float) for col in ('open', 'high', 'low', 'close'))
+    patterns = cdl_patterns(df)
+    try:
+        import pandas_ta as ta
+        library = ta.cdl_pattern(df['open'], df['high'], df['low'], df['close'], name=CANDLE_PATTERNS)
+    except ImportError:
+        if require_library:
+            print("pandas_ta / TA-Lib not installed: cannot compare with ta.cdl_pattern")
+            return 1
+        library = None
+    failures = 0
+    for name in CANDLE_PATTERNS:
+        column = PATTERN_FUNCTIONS[name][1]
+        values = patterns[column].to_numpy()
+        checks = [('reference', REFERENCES[name](o, h, l, c))]
+        if library is not None:
+            checks.append(('pandas_ta', library[column].to_numpy()))
+        for source, expected in checks:
+            mismatches = np.flatnonzero(values != expected)
+            failures += len(mismatches)
+            print(f"{column:<20} vs {source:<10} {int((expected != 0).sum()):>6} signals  {len(mismatches):>6} mismatches"
+                  + (f" (first at {df.index[mismatches[0]]})" if len(mismatches) else ""))
+    for last in (1, 5, 50):
+        if not cdl_patterns(df, last=last).equals(patterns.iloc[-last:]):
+            print(f"cdl_patterns(last={last}) differs from the full series")
+            failures += 1
+    if library is None:
+        print("pandas_ta not installed: checked against the transcriptions only, not ta.cdl_pattern")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the NumPy candle patterns against TA-Lib / pandas_ta")
+    parser.add_argument("--candles", type=int, default=5000, help="candles in the sample")
+    parser.add_argument("--seed", type=int, default=7, help="seed of the sample")
+    parser.add_argument("--require-library", action="store_true",
+                        help="fail unless the comparison with pandas_ta / TA-Lib can run")
+    args = parser.parse_args()
+
+    sys.exit(1 if validate(sample_candles(args.candles, args.seed), args.require_library) else 0)
@@ -0,0 +1,72 @@
+import argparse
+import sys
+import time
+import numpy as np
+from arbitrage_core import optimize_rounded_stakes
+
+# Checks optimize_rounded_stakes against a brute-force enumeration of every placeable stake combination
+# on random mixed batches (2- and 3-way rows, arbitrage or not, several increments and stake limits),
+# then times the thin-margin cases whose lower-stake scan runs to its cap. Exits with status 1 on any
+# mismatch. Run from the repository root: python -m benchmarks.validate_rounded_stakes
+
+
+# Best guaranteed profit over the full lattice of placeable stakes, or NaN when the row is not an
+# arbitrage or nothing placeable fits the budget
+def brute_force(odds, budget, increment, min_stake, max_stake):
+    odds = odds[odds > 1.0]
+    if (1 / odds).sum() >= 1:
+        return np.nan
+    low = max(np.ceil(min_stake / increment), 1) * increment
+    grid = np.arange(low, min(max_stake, budget) + 1e-9, increment)
+    stakes = np.stack(np.meshgrid(*[grid] * len(odds), indexing='ij'), axis=-1).reshape(-1, len(odds))
+    staked = stakes.sum(axis=1)
+    profit = np.where(staked <= budget + 1e-9, (stakes * odds).min(axis=1) - staked, -np.inf)
+    return profit.max() if np.isfinite(profit.max()) else np.nan
+
+
+def random_batch(rng, rows):
+    odds = rng.uniform(1.6, 4.2, (rows, 3)).round(2)
+    odds[::2, 2] = 0
+    # Near-even two-way and three-way books, so every batch mixes arbitrage and non-arbitrage rows
+    odds[0] = rng.uniform(2.0, 2.25, 3).round(2) * [1, 1, 0]
+    odds[1] = rng.uniform(3.0, 3.4, 3).round(2)
+    return odds
+
+
+def validate(cases, seed):
+    rng = np.random.default_rng(seed)
+    rows = mismatches = 0
+    for _ in range(cases):
+        odds = random_batch(rng, 6)
+        budget = float(rng.integers(10, 40))
+        increment, min_stake = float(rng.choice([1, 2, 5])), float(rng.choice([0, 2, 5]))
+        max_stake = float(rng.choice([np.inf, 15, 25]))
+        _, profit = optimize_rounded_stakes(odds, budget, increment, min_stake, max_stake)
+        for row, got in zip(odds, profit):
+            expected = brute_force(row, budget, increment, min_stake, max_stake)
+            rows += 1
+            if not (np.isnan(got) and np.isnan(expected) or abs(got - expected) < 1e-6):
+                mismatches += 1
+                print(f"mismatch: odds {row.tolist()} budget {budget:g} increment {increment:g} "
+                      f"stakes {min_stake:g}-{max_stake:g}: {got} vs brute force {expected}")
+    print(f"{rows} rows checked against brute force, {mismatches} mismatches")
+    return mismatches
+
+
+def time_thin_margins():
+    for rows, budget in ((1, 1e3), (1, 1e6), (1000, 1e6)):
+        odds = np.tile([[2.0, 2.0000001]], (rows, 1))
+        start = time.perf_counter()
+        optimize_rounded_stakes(odds, budget, 0.01)
+        print(f"thin margin, {rows:>5} rows, budget {budget:>9,.0f}: {time.perf_counter() - start:8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the rounded-stake optimizer against brute force")
+    parser.add_argument("--cases", type=int, default=500, help="random batches of 6 rows")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the batches")
+    args = parser.parse_args()
+
+    failures = validate(args.cases, args.seed)
+    time_thin_margins()
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,105 @@
+import sys
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# The patterns the confluence scan reads, in pandas_ta's cdl_pattern naming
+CANDLE_PATTERNS = ['doji', 'engulfing', 'hammer', 'invertedhammer']
+# Candles a pattern looks back over, so the last N rows can be computed from the last N + WARMUP candles
+WARMUP = 11
+
+
+# Mean of the `length` values before each one (TA-Lib's candle averages exclude the current candle)
+def _trailing_mean(values, length):
+    means = np.full(len(values), np.nan)
+    if len(values) > length:
+        means[length:] = sliding_window_view(values[:-1], length).sum(axis=1) / length
+    return means
+
+
+# pandas_ta's own cdl_doji (the one pattern it does not take from TA-Lib): the body is shorter than
+# factor% of the mean high-low range of the last `length` candles, including the current one.
+# Like pandas_ta's non_zero_range, a column with any zero difference is shifted by machine epsilon.
+def cdl_doji(open_, high, low, close, length=10, factor=10):
+    body = close - open_
+    body = np.abs(body + sys.float_info.epsilon if (body == 0).any() else body)
+    hl_range = high - low
+    hl_range = np.abs(hl_range + sys.float_info.epsilon if (hl_range == 0).any() else hl_range)
+    hl_range_avg = np.full(len(hl_range), np.nan)
+    if len(hl_range) >= length:
+        hl_range_avg[length - 1:] = sliding_window_view(hl_range, length).mean(axis=1)
+    return np.where(body < 0.01 * factor * hl_range_avg, 100, 0)
+
+
+# TA-Lib's CDLENGULFING: a candle whose body engulfs the opposite-coloured body before it;
+# +/-100, or +/-80 when one end of the bodies is equal. The first two candles are 0.
+def cdl_engulfing(open_, high, low, close):
+    out = np.zeros(len(close), dtype=int)
+    if len(close) < 3:
+        return out
+    o, c, po, pc = open_[1:], close[1:], open_[:-1], close[:-1]
+    white_engulfs = (c >= o) & (pc < po) & (((c >= po) & (o < pc)) | ((c > po) & (o <= pc)))
+    black_engulfs = (c < o) & (pc >= po) & (((o >= pc) & (c < po)) | ((o > pc) & (c <= po)))
+    color = np.where(c >= o, 1, -1)
+    strength = np.where((o != pc) & (c != po), 100, 80)
+    out[1:] = np.where(white_engulfs | black_engulfs, color * strength, 0)
+    out[:2] = 0
+    return out
+
+
+# Shared by hammer and inverted hammer, with TA-Lib's default candle settings: a short body (below the
+# mean body of the previous 10 candles), one shadow longer than the body and the other shorter than
+# a tenth of the mean range of the previous 10 candles. The first 11 candles are 0.
+def _small_body_long_shadow(open_, high, low, close, long_shadow, short_shadow):
+    body = np.abs(close - open_)
+    return (body < _trailing_mean(body, 10)) & (long_shadow > body) & \
+           (short_shadow < 0.1 * _trailing_mean(high - low, 10))
+
+
+# TA-Lib's CDLHAMMER: small body, long lower shadow, almost no upper shadow, and the body at or near
+# the previous candle's low (within 0.2 of the mean range of the 5 candles before that one)
+def cdl_hammer(open_, high, low, close):
+    out = np.zeros(len(close), dtype=int)
+    if len(close) <= WARMUP:
+        return out
+    body_low, body_high = np.minimum(open_, close), np.maximum(open_, close)
+    shape = _small_body_long_shadow(open_, high, low, close, body_low - low, high - body_high)
+    near = 0.2 * _trailing_mean(high - low, 5)
+    near_prior_low = body_low[1:] <= low[:-1] + near[:-1]
+    out[1:] = np.where(shape[1:] & near_prior_low, 100, 0)
+    out[:WARMUP] = 0
+    return out
+
+
+# TA-Lib's CDLINVERTEDHAMMER: small body, long upper shadow, almost no lower shadow, and the body
+# gapping below the previous candle's body
+def cdl_invertedhammer(open_, high, low, close):
+    out = np.zeros(len(close), dtype=int)
+    if len(close) <= WARMUP:
+        return out
+    body_low, body_high = np.minimum(open_, close), np.maximum(open_, close)
+    shape = _small_body_long_shadow(open_, high, low, close, high - body_high, body_low - low)
+    gap_down = body_high[1:] < body_low[:-1]
+    out[1:] = np.where(shape[1:] & gap_down, 100, 0)
+    out[:WARMUP] = 0
+    return out
+
+
+PATTERN_FUNCTIONS = {
+    'doji': (cdl_doji, 'CDL_DOJI_10_0.1'),
+    'engulfing': (cdl_engulfing, 'CDL_ENGULFING'),
+    'hammer': (cdl_hammer, 'CDL_HAMMER'),
+    'invertedhammer': (cdl_invertedhammer, 'CDL_INVERTEDHAMMER')
+}
+
+
+# Drop-in for ta.cdl_pattern(name=names) on the patterns above, with its column names and values.
+# With `last`, only the last `last` candles are computed (from the WARMUP candles before them);
+# those rows are the same as in the full series except for frames shorter than the warm-up.
+def cdl_patterns(df, names=CANDLE_PATTERNS, last=None):
+    if last is not None:
+        df = df.iloc[-(last + WARMUP):]
+    open_, high, low, close = (df[c].to_numpy(dtype=float) for c in ('open', 'high', 'low', 'close'))
+    patterns = pd.DataFrame({column: fn(open_, high, low, close).astype(float)
+                             for fn, column in (PATTERN_FUNCTIONS[name] for name in names)}, index=df.index)
+    return patterns.iloc[-last:] if last is not None else patterns
@@ -0,0 +1,37 @@
+import ccxt
+import numpy as np
+import pandas as pd
+
+# Higher timeframes built from a stored lower one instead of being fetched separately
+DERIVED_FROM = {'4h': '1h', '1d': '1h', '1w': '1d'}
+
+
+def timeframe_ms(timeframe):
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+# Aggregate OHLCV candles (DataFrame indexed by timestamp, as returned by CandleStore.load) into
+# `timeframe` bars. Buckets are aligned to multiples of the bar length since the Unix epoch, as
+# Kraken's own candles are (so 1w bars start on Thursday 00:00 UTC). A leading bucket that the
+# input only covers partially is dropped; the last bucket is kept even if still forming, like the
+# exchange's newest candle.
+def resample_ohlcv(df, timeframe):
+    if df.empty:
+        return df.copy()
+    step = timeframe_ms(timeframe)
+    ts = np.asarray((df.index - pd.Timestamp(0)) // pd.Timedelta(1, 'ms'), dtype=np.int64)
+    buckets = ts // step
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    values = {c: df[c].to_numpy(dtype=float) for c in ('open', 'high', 'low', 'close', 'volume')}
+    ends = np.append(starts[1:], len(ts)) - 1
+    bars = pd.DataFrame({
+        'open': values['open'][starts],
+        'high': np.maximum.reduceat(values['high'], starts),
+        'low': np.minimum.reduceat(values['low'], starts),
+        'close': values['close'][ends],
+        'volume': np.add.reduceat(values['volume'], starts)
+    }, index=pd.to_datetime(buckets[starts] * step, unit='ms'))
+    bars.index.name = df.index.name
+    if ts[0] != buckets[0] * step:
+        bars = bars.iloc[1:]
+    return bars
@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from candle_resample import DERIVED_FROM, resample_ohlcv, timeframe_ms
+from kraken_client import MARKET_DATA_DIR, fetch_ohlcv
+
+CANDLES_DB_PATH = os.path.join(MARKET_DATA_DIR, "candles.db")
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+# A series fetched less than this many seconds ago is served from disk without asking the exchange
+MIN_REFRESH = 30
+# Most candles Kraken returns per OHLC request
+MAX_FETCH = 720
+# Seconds before a series marked exhausted is tried for older history again
+EXHAUSTED_TTL = 24 * 60 * 60
+
+
+# OHLCV candles persisted in SQLite, one row per (symbol, timeframe, timestamp), so repeated views only
+# download candles newer than the last stored one. The newest candle is still forming and gets
+# overwritten on the next refresh. Older history is backfilled when a caller asks for more candles
+# than are stored; once the exchange has nothing older the series is marked exhausted (the column
+# holds the time it was marked, and the mark expires after EXHAUSTED_TTL). Kraken only
+# serves its latest MAX_FETCH candles, so a refresh after a longer pause cannot close the gap; the
+# series then restarts from the candles it got rather than keeping a hole.
+class CandleStore:
+    def __init__(self, db_path=CANDLES_DB_PATH, fetch=fetch_ohlcv, min_refresh=MIN_REFRESH):
+        self.db_path = db_path
+        self.fetch = fetch
+        self.min_refresh = min_refresh
+        self._lock = threading.Lock()
+        self._series_locks = {}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS candles (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (symbol, timeframe, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS series (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                refreshed_at REAL,
+                exhausted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (symbol, timeframe)
+            );
+        """)
+
+    def _series_lock(self, symbol, timeframe):
+        with self._lock:
+            return self._series_locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def _series(self, symbol, timeframe):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(ts), MAX(ts), COUNT(*) FROM candles WHERE symbol = ? AND timeframe = ?", (symbol, timeframe)
+            ).fetchone()
+            meta = self._conn.execute(
+                "SELECT refreshed_at, exhausted FROM series WHERE symbol = ? AND timeframe = ?", (symbol, timeframe)
+            ).fetchone()
+        first_ts, last_ts, count = row
+        refreshed_at, exhausted = meta if meta else (None, 0)
+        return first_ts, last_ts, count, refreshed_at, time.time() - exhausted < EXHAUSTED_TTL
+
+    def _store(self, symbol, timeframe, candles, refreshed=False, exhausted=None, restart=False):
+        with self._lock, self._conn:
+            if restart:
+                self._conn.execute("DELETE FROM candles WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+                self._conn.execute("UPDATE series SET exhausted = 0 WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candles (symbol, timeframe, ts, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(symbol, timeframe, int(c[0]), *c[1:6]) for c in candles]
+            )
+            self._conn.execute("INSERT OR IGNORE INTO series (symbol, timeframe) VALUES (?, ?)", (symbol, timeframe))
+            if refreshed:
+                self._conn.execute("UPDATE series SET refreshed_at = ? WHERE symbol = ? AND timeframe = ?",
+                                   (time.time(), symbol, timeframe))
+            if exhausted is not None:
+                self._conn.execute("UPDATE series SET exhausted = ? WHERE symbol = ? AND timeframe = ?",
+                                   (int(time.time()) if exhausted else 0, symbol, timeframe))
+
+    # The fetching logic below is written as generators that yield (symbol, timeframe, since, limit)
+    # requests and are sent back the candles, so the same code runs with the blocking fetch (get) or
+    # an async one (aget). Closing the generator on errors releases the series lock it holds.
+    def _drive(self, steps):
+        try:
+            request = next(steps)
+            while True:
+                symbol, timeframe, since, limit = request
+                request = steps.send(self.fetch(symbol, timeframe=timeframe, since=since, limit=limit))
+        except StopIteration as done:
+            return done.value
+        finally:
+            steps.close()
+
+    async def _adrive(self, steps, fetch):
+        try:
+            request = next(steps)
+            while True:
+                symbol, timeframe, since, limit = request
+                request = steps.send(await fetch(symbol, timeframe=timeframe, since=since, limit=limit))
+        except StopIteration as done:
+            return done.value
+        finally:
+            steps.close()
+
+    # Fetch candles newer than the last stored one (re-fetching that one, it may have been open). If the
+    # exchange no longer has the candles right after it, the stored series is replaced by the new ones.
+    def refresh(self, symbol, timeframe, limit=MAX_FETCH):
+        return self._drive(self._refresh(symbol, timeframe, limit))
+
+    def _refresh(self, symbol, timeframe, limit):
+        with self._series_lock(symbol, timeframe):
+            _, last_ts, _, refreshed_at, _ = self._series(symbol, timeframe)
+            if refreshed_at is not None and time.time() - refreshed_at < self.min_refresh:
+                return 0
+            candles = yield symbol, timeframe, last_ts, None if last_ts else limit
+            gap = last_ts is not None and len(candles) > 0 and candles[0][0] > last_ts + timeframe_ms(timeframe)
+            self._store(symbol, timeframe, candles, refreshed=True, restart=gap)
+            return len(candles)
+
+    # Make at least `count` candles available by fetching history before the first stored candle
+    def backfill(self, symbol, timeframe, count):
+        return self._drive(self._backfill(symbol, timeframe, count))
+
+    def _backfill(self, symbol, timeframe, count):
+        with self._series_lock(symbol, timeframe):
+            first_ts, _, stored, _, exhausted = self._series(symbol, timeframe)
+            if stored >= count or exhausted or first_ts is None:
+                return 0
+            step = timeframe_ms(timeframe)
+            missing = min(count - stored, MAX_FETCH)
+            candles = [c for c in (yield symbol, timeframe, first_ts - missing * step, missing) if c[0] < first_ts]
+            self._store(symbol, timeframe, candles, exhausted=not candles)
+            return len(candles)
+
+    def load(self, symbol, timeframe, limit=None, start=None):
+        query = "SELECT ts, open, high, low, close, volume FROM candles WHERE symbol = ? AND timeframe = ?"
+        params = [symbol, timeframe]
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(int(start))
+        query += " ORDER BY ts DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        df = pd.DataFrame(rows[::-1], columns=OHLCV_COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df.set_index('timestamp')
+
+    # The latest `limit` candles, refreshed from the exchange if due and backfilled if too few are stored.
+    # Timeframes in DERIVED_FROM are built from their base timeframe when the base candles they need fit
+    # in one fetch or are already stored, so one base fetch feeds them; otherwise they are fetched
+    # directly (e.g. 90 1d bars need 2184 1h candles, more than Kraken serves, until the store holds them).
+    def get(self, symbol, timeframe, limit, derive=True):
+        return self._drive(self._get(symbol, timeframe, limit, derive))
+
+    # get() with an async fetch (e.g. an AsyncSharedKraken's fetch_ohlcv). A series being fetched holds
+    # its lock across the await, so concurrent tasks must not load the same symbol.
+    async def aget(self, symbol, timeframe, limit, fetch, derive=True):
+        return await self._adrive(self._get(symbol, timeframe, limit, derive), fetch)
+
+    def _get(self, symbol, timeframe, limit, derive):
+        if derive and timeframe in DERIVED_FROM:
+            bars = yield from self._derive(symbol, timeframe, DERIVED_FROM[timeframe], limit)
+            if bars is not None:
+                return bars
+        yield from self._refresh(symbol, timeframe, MAX_FETCH)
+        while True:
+            _, _, stored, _, exhausted = self._series(symbol, timeframe)
+            if stored >= limit or exhausted or not (yield from self._backfill(symbol, timeframe, limit)):
+                break
+        return self.load(symbol, timeframe, limit)
+
+    # `limit` bars of timeframe resampled from base candles, or None if the base history is too short
+    def derive(self, symbol, timeframe, base, limit):
+        return self._drive(self._derive(symbol, timeframe, base, limit))
+
+    def _derive(self, symbol, timeframe, base, limit):
+        needed = (limit + 1) * (timeframe_ms(timeframe) // timeframe_ms(base))
+        # Backfilling past what one request returns fails on Kraken, which only serves the latest candles
+        if needed > MAX_FETCH and self._series(symbol, base)[2] < needed:
+            return None
+        base_candles = yield from self._get(symbol, base, needed, False)
+        if base_candles.empty:
+            return None
+        bars = resample_ohlcv(base_candles, timeframe)
+        return bars.iloc[-limit:] if len(bars) >= limit else None
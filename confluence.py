@@ -0,0 +1,161 @@
+import logging
+import numpy as np
+import pandas as pd
+from candle_patterns import cdl_patterns
+from candle_resample import timeframe_ms
+
+logger = logging.getLogger(__name__)
+
+# Timeframes the confluence scan scores, with their weight in the combined score
+SCAN_TIMEFRAMES = ['1d', '4h', '1h']
+TIMEFRAME_WEIGHTS = {'1d': 0.5, '4h': 0.3, '1h': 0.2}
+
+NA_RESULT = {
+    "Trend": "N/A",
+    "RSI": "N/A",
+    "Volume": "N/A",
+    "Candle Pattern": "N/A",
+    "Fib 61.8%": "N/A"
+}
+NA_RISK_MANAGEMENT = {
+    "Stop Loss (Long)": "N/A",
+    "Take Profit (Long)": "N/A",
+    "Stop Loss (Short)": "N/A",
+    "Take Profit (Short)": "N/A"
+}
+
+
+# Stop-loss and take-profit distances in ATRs
+STOP_ATR = 2
+TARGET_ATR = 3
+# Candles the Fibonacci 61.8% level is measured over
+FIB_LOOKBACK = 50
+SCORE_COMPONENTS = ['trend', 'rsi', 'macd', 'bb', 'stoch', 'volume', 'fib', 'pattern']
+
+
+# Bullish / bearish flags per candle from the cdl_patterns columns
+def pattern_flags(candle_patterns, length):
+    bullish = np.zeros(length, dtype=bool)
+    bearish = np.zeros(length, dtype=bool)
+    if candle_patterns is not None:
+        for col in candle_patterns.columns:
+            values = candle_patterns[col].to_numpy()
+            if 'CDL_HAMMER' in col:
+                bullish |= values > 0
+            elif 'CDL_ENGULFING' in col:
+                bullish |= values > 0
+                bearish |= values < 0
+    return bullish, bearish
+
+
+# The unweighted score components. Works on the scalars of one candle as well as on arrays of whole
+# columns, so the live scan and the history scorer apply the same rules.
+def component_scores(close, volume, indicators, fib_618, bullish, bearish):
+    rsi = indicators['RSI']
+    near_upper = abs(close - indicators['BB_upper']) / close < 0.02
+    near_lower = abs(close - indicators['BB_lower']) / close < 0.02
+    return {
+        'trend': np.where(indicators['MA20'] > indicators['MA50'], 1, -1),
+        'rsi': np.where((rsi > 30) & (rsi < 70), 1, np.where((rsi > 70) | (rsi < 30), -1, 0)),
+        'macd': np.where((indicators['MACDh'] > 0) & (indicators['MACD'] > 0), 1, -1),
+        'bb': np.where(near_upper, -0.5, np.where(near_lower, 0.5, 0)),
+        'stoch': np.where(indicators['Stoch_K'] > 80, -0.5, np.where(indicators['Stoch_K'] < 20, 0.5, 0)),
+        'volume': np.where(volume > indicators['Volume_MA10'] * 1.5, 0.5, -0.5),
+        'fib': np.where(abs(close - fib_618) / close < 0.02, 0.5, 0),
+        'pattern': np.where(bullish, 0.5, np.where(bearish, -0.5, 0))
+    }
+
+
+# Signals and weighted score of one timeframe's candles, given the indicator values of its last candle
+def score_timeframe(tf, df, latest, weights=TIMEFRAME_WEIGHTS):
+    logger.info(f"Number of candles loaded for {tf}: {len(df)}")
+    if len(df) < 50:
+        raise ValueError(f"Insufficient data for timeframe {tf}: {len(df)} candles")
+    if not all(col in df.columns for col in ['open', 'high', 'low', 'close', 'volume']):
+        raise ValueError(f"Missing required columns in OHLCV data for {tf}")
+
+    close = df['close'].iloc[-1]
+
+    # Fibonacci proximity
+    lookback = min(FIB_LOOKBACK, len(df))
+    recent_high = df['high'][-lookback:].max()
+    recent_low = df['low'][-lookback:].min()
+    fib_618 = recent_high - (recent_high - recent_low) * 0.618
+
+    # Candlestick patterns (only the last candle's are computed)
+    bullish, bearish = pattern_flags(cdl_patterns(df, last=1), 1)
+    bullish_pattern, bearish_pattern = bool(bullish[-1]), bool(bearish[-1])
+
+    # Signals
+    scores = {name: float(value) for name, value in component_scores(
+        close, df['volume'].iloc[-1], latest, fib_618, bullish_pattern, bearish_pattern).items()}
+    rsi = latest['RSI']
+    volume_signal = "strong" if scores['volume'] > 0 else "weak"
+
+    # Risk management
+    stop_loss_long = close - STOP_ATR * latest['ATR']
+    take_profit_long = close + TARGET_ATR * latest['ATR']
+    stop_loss_short = close + STOP_ATR * latest['ATR']
+    take_profit_short = close - TARGET_ATR * latest['ATR']
+
+    # Total score for this timeframe
+    tf_score = sum(scores.values()) * weights.get(tf, 0.1)
+
+    # Base result dictionary
+    result = {
+        "Timeframe": tf,
+        "Trend": "uptrend" if scores['trend'] > 0 else "downtrend",
+        "RSI": f"{rsi:.2f} ({'overbought' if rsi > 70 else 'oversold' if rsi < 30 else 'neutral'})",
+        "Volume": volume_signal,
+        "Candle Pattern": "Bullish" if bullish_pattern else "Bearish" if bearish_pattern else "None",
+        "Fib 61.8%": f"{fib_618:.4f}" + (" (near)" if scores['fib'] else "")
+    }
+
+    risk_management = {
+        "Stop Loss (Long)": f"{stop_loss_long:.4f}",
+        "Take Profit (Long)": f"{take_profit_long:.4f}",
+        "Stop Loss (Short)": f"{stop_loss_short:.4f}",
+        "Take Profit (Short)": f"{take_profit_short:.4f}"
+    }
+
+    return result, risk_management, tf_score
+
+
+# score_timeframe for every candle at once: the score components and weighted 'score' per candle, each
+# computed from the candles up to and including it (indicators as returned by IndicatorEngine.frame)
+def score_history(tf, df, indicators, weights=TIMEFRAME_WEIGHTS):
+    close = df['close'].to_numpy(dtype=float)
+    recent_high = df['high'].rolling(FIB_LOOKBACK, min_periods=1).max().to_numpy()
+    recent_low = df['low'].rolling(FIB_LOOKBACK, min_periods=1).min().to_numpy()
+    fib_618 = recent_high - (recent_high - recent_low) * 0.618
+    bullish, bearish = pattern_flags(cdl_patterns(df), len(df))
+    columns = {name: indicators[name].to_numpy(dtype=float) for name in
+               ('MA20', 'MA50', 'RSI', 'MACD', 'MACDh', 'BB_upper', 'BB_lower', 'Stoch_K', 'Volume_MA10')}
+    scores = pd.DataFrame(component_scores(close, df['volume'].to_numpy(dtype=float), columns, fib_618, bullish, bearish),
+                          index=df.index, columns=SCORE_COMPONENTS)
+    scores['score'] = scores.sum(axis=1) * weights.get(tf, 0.1)
+    return scores
+
+
+# Combined score per candle of the first timeframe in `histories` ({timeframe: score_history frame},
+# lowest timeframe first). Each other timeframe contributes the score of its last candle that had
+# closed by then, so the history never looks ahead of what the live scan could have seen.
+def confluence_history(histories):
+    timeframes = list(histories)
+    base_tf = timeframes[0]
+    base = histories[base_tf]
+    closes_at = base.index + pd.Timedelta(timeframe_ms(base_tf), 'ms')
+    total = base['score'].to_numpy().copy()
+    for tf in timeframes[1:]:
+        other = histories[tf]['score']
+        known = pd.Series(other.to_numpy(), index=other.index + pd.Timedelta(timeframe_ms(tf), 'ms'))
+        total += known.reindex(closes_at, method='ffill').fillna(0).to_numpy()
+    return pd.Series(total, index=base.index, name='confluence')
+
+
+# Combined score of a symbol's timeframes, past which a setup counts as high-probability
+SIGNAL_THRESHOLD = 1.5
+
+
+def confluence_signal(score):
+    return "Strong LONG" if score > SIGNAL_THRESHOLD else "Strong SHORT" if score < -SIGNAL_THRESHOLD else "Neutral"
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+import time
+from types import SimpleNamespace
+
+# Simulated generation speed of the local stand-in, in chunks (words) per second; 0 disables delays
+FAKE_LLM_WORDS_PER_SECOND = 200
+
+
+# Deterministic analysis text built from the prompt, so cached/streamed paths can be checked offline
+def fake_analysis(messages):
+    prompt = messages[-1]['content']
+    digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+    lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+    value_lines = [line for line in lines if "vs fair" in line]
+    match = next((line for line in lines if line.startswith("Match:")), "Match: unknown")
+    sections = [
+        "### Match Overview",
+        f"{match[len('Match:'):].strip()} (offline analysis {digest}).",
+        "### Odds & Market Assessment",
+        f"The prompt lists {len(lines)} lines of market data.",
+        "### Value Bets & Recommendations",
+        "\n".join(f"- {line}" for line in value_lines[:5]) or "No value bets above the consensus price."
+    ]
+    return "\n\n".join(sections)
+
+
+def _completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+# Drop-in for groq.Groq: chat.completions.create() with or without stream=True
+class FakeGroq:
+    def __init__(self, api_key=None, words_per_second=FAKE_LLM_WORDS_PER_SECOND, **kwargs):
+        self.words_per_second = words_per_second
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, stream=False, **kwargs):
+        text = fake_analysis(messages)
+        if not stream:
+            time.sleep(len(text.split(" ")) / self.words_per_second if self.words_per_second else 0)
+            return _completion(text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        for word in text.split(" "):
+            if self.words_per_second:
+                time.sleep(1 / self.words_per_second)
+            yield _chunk(word + " ")
+
+
+# Drop-in for groq.AsyncGroq (non-streaming), usable as an async context manager
+class FakeAsyncGroq:
+    def __init__(self, api_key=None, words_per_second=FAKE_LLM_WORDS_PER_SECOND, **kwargs):
+        self.words_per_second = words_per_second
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def _create(self, model, messages, **kwargs):
+        text = fake_analysis(messages)
+        if self.words_per_second:
+            await asyncio.sleep(len(text.split(" ")) / self.words_per_second)
+        return _completion(text)
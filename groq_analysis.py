@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import groq
+import pandas as pd
+from fake_llm import FakeAsyncGroq, FakeGroq
+from odds_cache import ODDS_DATA_DIR
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ANALYSIS_DB_PATH = os.path.join(ODDS_DATA_DIR, "analysis_cache.db")
+ANALYSIS_MODEL = os.getenv("GROQ_MODEL", "meta-llama/llama-4-maverick-17b-128e-instruct")
+# GROQ_MODE=fake swaps Groq for the local stand-in in fake_llm.py (no API key or network needed)
+GROQ_MODE = os.getenv("GROQ_MODE", "live")
+# Analyses older than this are regenerated even if the odds have not moved (news, lineups)
+ANALYSIS_MAX_AGE = 12 * 60 * 60
+ANALYSIS_MAX_TOKENS = 2000
+ANALYSIS_TEMPERATURE = 0.2
+
+# Batch analysis: concurrent requests in flight and retries per event on rate limits / server errors
+BATCH_CONCURRENCY = int(os.getenv("GROQ_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_RETRIES = 5
+
+ANALYSIS_SYSTEM_PROMPT = """
+You are a highly experienced sports betting analyst. Using the provided odds and match data, deliver a comprehensive, structured betting analysis that includes:
+
+- **Match Overview:** Briefly summarize the key details of the match.  
+- **Recent Form Analysis:** Evaluate the recent performances of both teams/players.  
+- **Head-to-Head Comparison:** Highlight relevant historical results and trends.  
+- **Odds & Market Assessment:** Analyze current market odds to identify discrepancies or potential value across all available bet types (e.g., match winner, totals/over-under, handicaps, props, etc.).  
+- **Risk Factors:** Discuss uncertainties, injuries, lineup changes, or other factors that could influence the outcome.  
+- **Value Bets & Recommendations:** Clearly identify any value bets across all markets, explain your reasoning, and provide actionable betting recommendations for each.  
+
+Ensure your analysis is logical, data-driven, and easy to follow. Present your findings in a well-structured format with clear headings for each section.
+
+"""
+
+
+def analysis_user_prompt(match_summary):
+    return f"""Here is the latest data for the match:
+{match_summary}
+Please provide a detailed betting analysis and recommendations."""
+
+
+# Stable digest of an event's odds (rows of the normalized odds table); changes whenever any
+# bookmaker's price or line changes, independent of row order
+def odds_fingerprint(rows):
+    columns = rows[['bookmaker', 'market', 'outcome', 'point', 'price']].astype(
+        {'bookmaker': object, 'market': object, 'outcome': object}
+    )
+    hashes = pd.util.hash_pandas_object(columns, index=False).to_numpy()
+    hashes.sort()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:32]
+
+
+# Cache key of one analysis; the prompt is part of it so editing the instructions invalidates old answers
+def analysis_key(event_id, markets, fingerprint, model, prompt=""):
+    markets = ",".join(sorted(markets))
+    digest = hashlib.sha256(prompt.encode()).hexdigest()[:16]
+    return f"{event_id}|{markets}|{fingerprint}|{model}|{digest}"
+
+
+# Finished LLM analyses persisted in SQLite, so repeat views of an event with unchanged odds cost nothing
+class AnalysisCache:
+    def __init__(self, db_path=ANALYSIS_DB_PATH, max_age=ANALYSIS_MAX_AGE):
+        self.db_path = db_path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                key TEXT PRIMARY KEY,
+                event_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+
+    # (analysis, created_at) or None if missing or expired
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT analysis, created_at FROM analyses WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return row
+
+    def put(self, key, event_id, model, analysis):
+        created_at = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, event_id, model, analysis, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, event_id, model, analysis, created_at)
+            )
+            self._conn.execute("DELETE FROM analyses WHERE created_at < ?", (created_at - self.max_age,))
+        return analysis, created_at
+
+
+def make_client(api_key):
+    return FakeGroq() if GROQ_MODE == "fake" else groq.Groq(api_key=api_key)
+
+
+# Retries are handled by _analyze so backoff does not hold a concurrency slot
+def make_async_client(api_key):
+    return FakeAsyncGroq() if GROQ_MODE == "fake" else groq.AsyncGroq(api_key=api_key, max_retries=0)
+
+
+# Yield the completion text chunk by chunk as Groq streams it
+def stream_completion(client, model, system_prompt, user_prompt, max_tokens=ANALYSIS_MAX_TOKENS,
+                      temperature=ANALYSIS_TEMPERATURE):
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+# Seconds to wait before retrying a failed request: the server's Retry-After when it sends one,
+# otherwise exponential backoff with jitter
+def _retry_delay(error, attempt):
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    try:
+        return max(float(retry_after), 0.1)
+    except (TypeError, ValueError):
+        return min(2 ** attempt, 30) * (0.5 + random.random())
+
+
+async def _analyze(client, semaphore, model, user_prompt, max_retries):
+    for attempt in range(max_retries + 1):
+        # The slot is released while backing off so other events keep the connection busy
+        async with semaphore:
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=ANALYSIS_MAX_TOKENS,
+                    temperature=ANALYSIS_TEMPERATURE
+                )
+                return response.choices[0].message.content
+            except (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError) as e:
+                if attempt == max_retries:
+                    raise
+                delay = _retry_delay(e, attempt)
+                logger.warning(f"Groq request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def _analyze_batch(client, jobs, cache, model, concurrency, max_retries, on_done):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        try:
+            analysis = await _analyze(client, semaphore, model, job['prompt'], max_retries)
+            cache.put(job['key'], job['event_id'], model, analysis)
+            result = analysis
+        except groq.GroqError as e:
+            logger.error(f"Analysis of event {job['event_id']} failed: {e}")
+            result = e
+        if on_done is not None:
+            on_done(job, result)
+        return job['key'], result
+
+    return dict(await asyncio.gather(*(run(job) for job in jobs)))
+
+
+# Analyze many events in parallel through AsyncGroq. jobs are dicts with 'key' (see analysis_key),
+# 'event_id' and 'prompt' (the user prompt); events already in the cache are skipped. Finished
+# analyses go into the cache, so the single-event view picks them up for free. Returns
+# {key: analysis text or the exception that ended its retries}; on_done(job, result) is called as
+# each event finishes, on the calling thread.
+def run_batch_analysis(api_key, jobs, cache, model=ANALYSIS_MODEL, concurrency=BATCH_CONCURRENCY,
+                       max_retries=BATCH_MAX_RETRIES, on_done=None):
+    pending = [job for job in jobs if cache.get(job['key']) is None]
+    if not pending:
+        return {}
+
+    async def main():
+        async with make_async_client(api_key) as client:
+            return await _analyze_batch(client, pending, cache, model, concurrency, max_retries, on_done)
+
+    return asyncio.run(main())
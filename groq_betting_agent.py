@@ -1,33 +1,69 @@
 import streamlit as st
-import requests
 import pandas as pd
 import matplotlib.pyplot as plt
-from groq import Groq
 import os
+import time
 from dotenv import load_dotenv
 
-
-# Load environment variables from .env if present
+# Load environment variables from .env if present; the odds and analysis modules read their settings on import
 load_dotenv()
 
+from odds_cache import OddsCache, fetch_sports, fetch_odds, request_key, odds_request
+from odds_delta import OddsDeltaStore
+from odds_history import OddsHistory
+from odds_poller import OddsPoller
+from odds_table import OddsTable, odds_display_frame
+from odds_summary import build_match_summary
+from groq_analysis import (AnalysisCache, ANALYSIS_MODEL, ANALYSIS_SYSTEM_PROMPT, GROQ_MODE, analysis_key,
+                           analysis_user_prompt, make_client, odds_fingerprint, run_batch_analysis, stream_completion)
+from odds_fixtures import ODDS_MODE
+from odds_value import find_value_bets
+
 ODDS_API_KEY = os.getenv("ODDS_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 st.set_page_config(page_title="AI Sports Betting Agent", page_icon="⚽")
 st.title("AI Sports Betting Agent")
 
-if not ODDS_API_KEY or not GROQ_API_KEY:
+# Replayed odds fixtures (ODDS_MODE=replay) and the local LLM stand-in (GROQ_MODE=fake) need no keys
+if (not ODDS_API_KEY and ODDS_MODE != "replay") or (not GROQ_API_KEY and GROQ_MODE != "fake"):
     st.error("API keys not found in environment variables. Please set ODDS_API_KEY and GROQ_API_KEY in your .env file or environment.")
     st.stop()
 
-# --- Fetch available sports ---
-@st.cache_data
+# --- Odds cache shared by every session in this process (persisted in odds_data/) ---
+@st.cache_resource
+def get_odds_cache():
+    return OddsCache()
+
+odds_cache = get_odds_cache()
+
+# --- Price history of every line (persisted in odds_data/) ---
+@st.cache_resource
+def get_odds_history():
+    return OddsHistory()
+
+odds_history = get_odds_history()
+
+# --- Last seen price per line, diffed against every new odds response; changes feed the history ---
+@st.cache_resource
+def get_delta_store():
+    store = OddsDeltaStore()
+    store.subscribe(odds_history.record)
+    return store
+
+delta_store = get_delta_store()
+
+# --- Background poller keeping the cache fresh for every session in this process ---
+@st.cache_resource
+def get_odds_poller():
+    return OddsPoller(ODDS_API_KEY, odds_cache, delta_store).start()
+
+odds_poller = get_odds_poller()
+
+# --- Fetch available sports (refreshed by the poller; only an empty cache waits on the API) ---
 def get_sports(api_key):
-    url = f"https://api.the-odds-api.com/v4/sports/?apiKey={api_key}"
-    r = requests.get(url)
-    if r.status_code != 200:
-        return []
-    return r.json()
+    sports, _ = odds_cache.get(request_key("/sports/", {})) or fetch_sports(api_key, odds_cache)
+    return sports
 
 sports = get_sports(ODDS_API_KEY)
 sport_names = [s['title'] for s in sports]
@@ -51,18 +87,42 @@ selected_market_keys = [market_options[m] for m in selected_markets]
 markets_param = ",".join(selected_market_keys)
 
 # --- Fetch upcoming events with selected markets ---
-@st.cache_data
+# The poller refreshes watched sports in the background once their TTL expires, so pages read the
+# latest cached snapshot; only the first view of a sport/market combination fetches synchronously.
 def get_odds(api_key, sport_key, markets):
-    url = f"https://api.the-odds-api.com/v4/sports/{sport_key}/odds/?apiKey={api_key}&regions=eu&markets={markets}"
-    r = requests.get(url)
-    if r.status_code != 200:
-        return []
-    return r.json()
+    odds_poller.watch(sport_key, markets)
+    path, params = odds_request(sport_key, markets)
+    return odds_cache.get(request_key(path, params)) or fetch_odds(api_key, sport_key, markets, odds_cache)
+
+events, odds_fetched_at = get_odds(ODDS_API_KEY, selected_sport_key, markets_param)
+
+# --- Odds API quota ---
+quota = odds_cache.quota()
+if quota.get('remaining') is not None:
+    st.sidebar.metric("Odds API credits remaining", f"{quota['remaining']:,}")
+    st.sidebar.caption(f"Used: {quota['used']:,} | Cache TTL x{odds_cache.ttl_multiplier()}")
+if odds_poller.last_cycle:
+    st.sidebar.caption(f"Background refresh ran {int(time.time() - odds_poller.last_cycle)}s ago")
 
-events = get_odds(ODDS_API_KEY, selected_sport_key, markets_param)
 if not events:
     st.warning("No events found or API limit reached.")
     st.stop()
+st.caption(f"Odds updated {int((time.time() - odds_fetched_at) // 60)} min ago")
+delta_store.apply(selected_sport_key, events, odds_fetched_at, selected_market_keys)
+
+# --- Normalized odds of the whole response, built once per fetched payload and shared by all views ---
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_odds_table(sport_key, markets, fetched_at, _events):
+    return OddsTable(_events)
+
+odds_table = get_odds_table(selected_sport_key, markets_param, odds_fetched_at, events)
+
+# --- Value bets against the margin-free consensus, computed for every event of the sport at once ---
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_value_bets(sport_key, markets, fetched_at, _odds_table):
+    return find_value_bets(_odds_table.frame)
+
+value_bets = get_value_bets(selected_sport_key, markets_param, odds_fetched_at, odds_table)
 
 event_names = [f"{e['home_team']} vs {e['away_team']}" for e in events]
 selected_event_index = st.selectbox("Select a match:", range(len(event_names)), format_func=lambda i: event_names[i])
@@ -70,63 +130,124 @@ selected_event = events[selected_event_index]
 
 # --- Display odds table for all selected markets ---
 st.write("### Odds")
-odds_data = []
-for bookmaker in selected_event.get('bookmakers', []):
-    for market in bookmaker.get('markets', []):
-        if market['key'] in selected_market_keys:
-            for outcome in market['outcomes']:
-                odds_data.append({
-                    'Bookmaker': bookmaker['title'],
-                    'Market': market['key'],
-                    'Outcome': outcome['name'],
-                    'Odds': outcome['price']
-                })
-odds_df = pd.DataFrame(odds_data)
+moves = delta_store.last_moves(selected_event['id'])
+event_odds = odds_table.event(selected_event['id'], selected_market_keys)
+odds_df = odds_display_frame(event_odds, moves)
 st.table(odds_df)
 
+# --- Value bets for this match ---
+event_value_bets = value_bets[value_bets['event_id'] == selected_event['id']]
+event_value_bets = event_value_bets[event_value_bets['market'].isin(selected_market_keys)]
+if not event_value_bets.empty:
+    st.write("### Value Bets")
+    st.dataframe(pd.DataFrame({
+        'Bookmaker': event_value_bets['bookmaker'].astype(str),
+        'Market': event_value_bets['market'].astype(str),
+        'Outcome': event_value_bets['outcome'].astype(str) + event_value_bets['point'].map(lambda p: "" if pd.isna(p) else f" {p:+g}"),
+        'Odds': event_value_bets['price'],
+        'Fair Odds': event_value_bets['fair_price'].round(2),
+        'Edge %': (event_value_bets['edge'] * 100).round(2),
+        'Books': event_value_bets['books']
+    }), use_container_width=True, hide_index=True)
+st.sidebar.metric("Value bets in this sport", len(value_bets))
+
+# --- Line movement since earlier polls ---
+if moves:
+    st.write("### Line Movement")
+    movement_df = pd.DataFrame([{
+        'Bookmaker': m['bookmaker'],
+        'Market': m['market'],
+        'Outcome': m['outcome'] if m['point'] is None else f"{m['outcome']} {m['point']:+g}",
+        'Previous': m['old_price'],
+        'Current': m['new_price'],
+        'Change': m['new_price'] - m['old_price'],
+        'Updated': pd.to_datetime(m['ts'], unit='s').strftime('%H:%M:%S')
+    } for m in moves.values()])
+    st.dataframe(movement_df.sort_values('Change'), use_container_width=True)
+
+# --- Price history chart ---
+if selected_market_keys:
+    st.write("### Price History")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        history_market = st.selectbox("Market:", selected_market_keys, key="history_market")
+    history_outcomes = sorted(event_odds.loc[event_odds['market'] == history_market, 'outcome'].unique())
+    with col2:
+        history_outcome = st.selectbox("Outcome:", history_outcomes, key="history_outcome")
+    with col3:
+        history_range = st.radio("Range:", ["24h", "7d", "All"], horizontal=True, key="history_range")
+    history_start = {"24h": time.time() - 24 * 60 * 60, "7d": time.time() - 7 * 24 * 60 * 60}.get(history_range)
+    price_history = odds_history.price_series(selected_event['id'], history_market, history_outcome, start=history_start, end=time.time()) \
+        if history_outcome else pd.DataFrame()
+    if len(price_history) > 1:
+        st.line_chart(price_history)
+    else:
+        st.info("Price history builds up as odds are refreshed.")
+
 # --- Prepare data summary for AI ---
-match_summary = f"""
-Match: {selected_event['home_team']} vs {selected_event['away_team']}
-Sport: {selected_sport}
-Odds:
-"""
-for bookmaker in selected_event.get('bookmakers', []):
-    match_summary += f"\nBookmaker: {bookmaker['title']}"
-    for market in bookmaker.get('markets', []):
-        if market['key'] in selected_market_keys:
-            match_summary += f"\n  Market: {market['key']}"
-            for outcome in market['outcomes']:
-                match_summary += f"\n    {outcome['name']}: {outcome['price']}"
+match_summary = build_match_summary(selected_event, selected_sport, event_odds, event_value_bets)
 
 # --- AI Analysis ---
-if st.button("Generate AI Betting Analysis"):
-    client = Groq(api_key=GROQ_API_KEY)
-    system_prompt = """
-You are a highly experienced sports betting analyst. Using the provided odds and match data, deliver a comprehensive, structured betting analysis that includes:
-
-- **Match Overview:** Briefly summarize the key details of the match.  
-- **Recent Form Analysis:** Evaluate the recent performances of both teams/players.  
-- **Head-to-Head Comparison:** Highlight relevant historical results and trends.  
-- **Odds & Market Assessment:** Analyze current market odds to identify discrepancies or potential value across all available bet types (e.g., match winner, totals/over-under, handicaps, props, etc.).  
-- **Risk Factors:** Discuss uncertainties, injuries, lineup changes, or other factors that could influence the outcome.  
-- **Value Bets & Recommendations:** Clearly identify any value bets across all markets, explain your reasoning, and provide actionable betting recommendations for each.  
-
-Ensure your analysis is logical, data-driven, and easy to follow. Present your findings in a well-structured format with clear headings for each section.
-
-"""
-    user_prompt = f"""Here is the latest data for the match:
-{match_summary}
-Please provide a detailed betting analysis and recommendations."""
-    with st.spinner("Analyzing with AI..."):
-        response = client.chat.completions.create(
-            model="meta-llama/llama-4-maverick-17b-128e-instruct",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.2
-        )
-        analysis = response.choices[0].message.content
-        st.write("### AI Betting Analysis")
-        st.write(analysis)
+# One Groq client per process; finished analyses are cached per event, markets, odds fingerprint and model
+@st.cache_resource
+def get_groq_client():
+    return make_client(GROQ_API_KEY)
+
+@st.cache_resource
+def get_analysis_cache():
+    return AnalysisCache()
+
+analysis_cache = get_analysis_cache()
+current_analysis_key = analysis_key(selected_event['id'], selected_market_keys, odds_fingerprint(event_odds),
+                                    ANALYSIS_MODEL, ANALYSIS_SYSTEM_PROMPT)
+cached_analysis = analysis_cache.get(current_analysis_key)
+
+if st.button("Regenerate AI Betting Analysis" if cached_analysis else "Generate AI Betting Analysis"):
+    st.write("### AI Betting Analysis")
+    analysis = st.write_stream(stream_completion(
+        get_groq_client(), ANALYSIS_MODEL, ANALYSIS_SYSTEM_PROMPT, analysis_user_prompt(match_summary)
+    ))
+    if analysis:
+        analysis_cache.put(current_analysis_key, selected_event['id'], ANALYSIS_MODEL, analysis)
+elif cached_analysis:
+    analysis, created_at = cached_analysis
+    st.write("### AI Betting Analysis")
+    st.caption(f"Generated {int((time.time() - created_at) // 60)} min ago for the current odds")
+    st.write(analysis)
+
+# --- Batch analysis of several matches in parallel ---
+with st.expander("Analyze multiple matches"):
+    value_scores = value_bets.groupby('event_id', observed=True)['edge'].sum()
+    ranked_events = sorted(events, key=lambda e: value_scores.get(e['id'], 0.0), reverse=True)
+    batch_size = st.number_input("Matches (highest value score first):", min_value=1, max_value=len(events),
+                                 value=min(10, len(events)), step=1)
+    batch_events = ranked_events[:int(batch_size)]
+    batch_jobs = []
+    for event in batch_events:
+        rows = odds_table.event(event['id'], selected_market_keys)
+        event_value = value_bets[(value_bets['event_id'] == event['id']) & value_bets['market'].isin(selected_market_keys)]
+        batch_jobs.append({
+            'key': analysis_key(event['id'], selected_market_keys, odds_fingerprint(rows), ANALYSIS_MODEL, ANALYSIS_SYSTEM_PROMPT),
+            'event_id': event['id'],
+            'prompt': analysis_user_prompt(build_match_summary(event, selected_sport, rows, event_value))
+        })
+
+    if st.button(f"Analyze {len(batch_jobs)} matches"):
+        progress = st.progress(0.0, text="Analyzing matches...")
+        done = []
+
+        def on_batch_done(job, result):
+            done.append(job['key'])
+            progress.progress(len(done) / len(batch_jobs), text=f"Analyzed {len(done)} of {len(batch_jobs)} new matches")
+
+        failures = [r for r in run_batch_analysis(GROQ_API_KEY, batch_jobs, analysis_cache, on_done=on_batch_done).values()
+                    if isinstance(r, Exception)]
+        progress.empty()
+        if failures:
+            st.warning(f"{len(failures)} analyses failed: {failures[0]}")
+
+    for event, job in zip(batch_events, batch_jobs):
+        cached = analysis_cache.get(job['key'])
+        if cached:
+            st.write(f"#### {event['home_team']} vs {event['away_team']}")
+            st.write(cached[0])
@@ -0,0 +1,279 @@
+import bisect
+import copy
+import math
+import sys
+import threading
+from collections import OrderedDict, deque
+import pandas as pd
+
+NAN = float('nan')
+
+# Columns produced by StreamingIndicators, named as in technical-analysis-agent.py
+INDICATOR_COLUMNS = ['MA20', 'MA50', 'RSI', 'MACD', 'MACDh', 'MACDs', 'BB_upper', 'BB_mid', 'BB_lower',
+                     'Stoch_K', 'Stoch_D', 'Volume_MA10', 'ATR']
+# Indicator settings; the column names above stay the same whatever lengths are configured
+INDICATOR_PARAMS = {
+    'ma_fast': 20,
+    'ma_slow': 50,
+    'rsi': 14,
+    'macd': (12, 26, 9),
+    'bbands': (20, 2),
+    'stoch': (14, 3, 3),
+    'volume_ma': 10,
+    'atr': 14
+}
+# Series kept per (symbol, timeframe, params), one per first candle, least recently used dropped first
+SERIES_PER_KEY = 4
+
+
+# --- O(1) building blocks; each update() takes one value and returns the current output (NaN while warming up) ---
+class SMA:
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.total = 0.0
+
+    def update(self, x):
+        if math.isnan(x):
+            self.window.clear()
+            self.total = 0.0
+            return NAN
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.length:
+            self.total -= self.window.popleft()
+        return self.total / self.length if len(self.window) == self.length else NAN
+
+
+# Rolling mean and population standard deviation (ddof=0) with the add/remove form of Welford's update
+class RollingStd:
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x):
+        self.window.append(x)
+        if len(self.window) <= self.length:
+            delta = x - self.mean
+            self.mean += delta / len(self.window)
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.window.popleft()
+            old_mean = self.mean
+            self.mean += (x - old) / self.length
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+        if len(self.window) < self.length:
+            return NAN, NAN
+        return self.mean, math.sqrt(max(self.m2, 0.0) / self.length)
+
+
+# pandas ewm(alpha, adjust=True, min_periods) as used by pandas_ta's rma
+class AdjustedEWM:
+    def __init__(self, alpha, min_periods):
+        self.decay = 1.0 - alpha
+        self.min_periods = min_periods
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.count = 0
+
+    def update(self, x):
+        if math.isnan(x):
+            if self.count:
+                self.numerator *= self.decay
+                self.denominator *= self.decay
+            return NAN if self.count < self.min_periods else self.numerator / self.denominator
+        self.numerator = x + self.decay * self.numerator
+        self.denominator = 1.0 + self.decay * self.denominator
+        self.count += 1
+        return self.numerator / self.denominator if self.count >= self.min_periods else NAN
+
+
+# pandas_ta ema: seeded with the SMA of the first `length` valid values, then ewm(span, adjust=False)
+class EMA:
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.seed = []
+        self.value = NAN
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        if len(self.seed) < self.length:
+            self.seed.append(x)
+            if len(self.seed) == self.length:
+                self.value = sum(self.seed) / self.length
+            return self.value
+        self.value = (1.0 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+# Rolling max (or min with sign=-1) over the last `length` values with a monotonic deque
+class RollingExtreme:
+    def __init__(self, length, sign=1):
+        self.length = length
+        self.sign = sign
+        self.index = 0
+        self.candidates = deque()
+
+    def update(self, x):
+        key = self.sign * x
+        while self.candidates and self.candidates[-1][1] <= key:
+            self.candidates.pop()
+        self.candidates.append((self.index, key))
+        if self.candidates[0][0] <= self.index - self.length:
+            self.candidates.popleft()
+        self.index += 1
+        return self.sign * self.candidates[0][1] if self.index >= self.length else NAN
+
+
+# The indicator set of technical-analysis-agent.py, updated one candle at a time in O(1). Fed the same
+# candles from the same first candle, every value equals pandas_ta's (and pandas rolling means) up
+# to floating point rounding: MA20/50 and volume MA10 (rolling mean), RSI 14 (rma), MACD 12/26/9
+# (SMA-seeded ema, signal from the first MACD value), Bollinger 20/2 (ddof=0), Stochastic 14/3/3
+# (a flat high-low window gives %K 0 rather than NaN) and ATR 14 (rma of true range). The newest candle can be re-applied while it is still forming.
+class StreamingIndicators:
+    def __init__(self, params=None):
+        params = dict(INDICATOR_PARAMS, **(params or {}))
+        fast, slow, signal = params['macd']
+        stoch_length, stoch_k, stoch_d = params['stoch']
+        self.ma20, self.ma50, self.volume_ma10 = SMA(params['ma_fast']), SMA(params['ma_slow']), SMA(params['volume_ma'])
+        self.rsi_up, self.rsi_down = AdjustedEWM(1 / params['rsi'], params['rsi']), AdjustedEWM(1 / params['rsi'], params['rsi'])
+        self.ema_fast, self.ema_slow, self.macd_signal = EMA(fast), EMA(slow), EMA(signal)
+        self.bbands, self.bb_width = RollingStd(params['bbands'][0]), params['bbands'][1]
+        self.highest, self.lowest = RollingExtreme(stoch_length), RollingExtreme(stoch_length, sign=-1)
+        self.stoch_k, self.stoch_d = SMA(stoch_k), SMA(stoch_d)
+        self.atr = AdjustedEWM(1 / params['atr'], params['atr'])
+        self.prev_close = NAN
+        self.last_ts = None
+        self.values = {}
+        self._before_last = None
+
+    # Apply one candle; a candle with the timestamp of the previous one replaces it. Replacing needs
+    # the state from before that candle, so only candles applied with snapshot=True can be replaced:
+    # when streaming several candles, snapshot the last one only (the copy costs more than the update).
+    def update(self, ts, open_, high, low, close, volume, snapshot=True):
+        if ts == self.last_ts:
+            self.__dict__.update(self._before_last)
+        self._before_last = None
+        if snapshot:
+            self._before_last = copy.deepcopy({k: v for k, v in self.__dict__.items() if k != '_before_last'})
+        return self._apply(ts, high, low, close, volume)
+
+    def _apply(self, ts, high, low, close, volume):
+        diff = close - self.prev_close
+        up = self.rsi_up.update(max(diff, 0.0) if not math.isnan(diff) else NAN)
+        down = self.rsi_down.update(max(-diff, 0.0) if not math.isnan(diff) else NAN)
+        macd = self.ema_fast.update(close) - self.ema_slow.update(close)
+        signal = self.macd_signal.update(macd)
+        bb_mid, bb_std = self.bbands.update(close)
+        highest, lowest = self.highest.update(high), self.lowest.update(low)
+        # A flat window divides by machine epsilon instead of zero, as pandas_ta's non_zero_range does
+        raw_k = 100 * (close - lowest) / (highest - lowest if highest != lowest else sys.float_info.epsilon)
+        stoch_k = self.stoch_k.update(raw_k)
+        true_range = NAN if math.isnan(self.prev_close) else max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        self.values = {
+            'MA20': self.ma20.update(close),
+            'MA50': self.ma50.update(close),
+            'RSI': 100 * up / (up + down) if up + down else NAN,
+            'MACD': macd,
+            'MACDh': macd - signal,
+            'MACDs': signal,
+            'BB_upper': bb_mid + self.bb_width * bb_std,
+            'BB_mid': bb_mid,
+            'BB_lower': bb_mid - self.bb_width * bb_std,
+            'Stoch_K': stoch_k,
+            'Stoch_D': self.stoch_d.update(stoch_k),
+            'Volume_MA10': self.volume_ma10.update(volume),
+            'ATR': self.atr.update(true_range)
+        }
+        self.prev_close = close
+        self.last_ts = ts
+        return self.values
+
+    # Stream a whole OHLCV frame and return every indicator as a column (for validation and charts)
+    def run(self, df):
+        candles = df[['open', 'high', 'low', 'close', 'volume']].itertuples(index=False, name=None)
+        rows = [dict(self.update(ts, *values, snapshot=i == len(df) - 1))
+                for i, (ts, values) in enumerate(zip(df.index, candles))]
+        return pd.DataFrame(rows, index=df.index, columns=INDICATOR_COLUMNS)
+
+
+def _params_key(params):
+    return tuple(sorted(dict(INDICATOR_PARAMS, **(params or {})).items()))
+
+
+# One series' streaming state plus the indicator rows computed so far
+class _Series:
+    def __init__(self, params):
+        self.state = StreamingIndicators(params)
+        self.index = []
+        self.rows = []
+        self.last_candle = None
+        self.views = {}
+
+
+# The single indicator pipeline behind the chart and the scanner. The EMA/RMA based values (RSI, MACD,
+# ATR) depend on the candle a series starts from, so a series is kept per (symbol, timeframe, params)
+# and first candle, and a frame's values depend only on the candles in it: the same frame gives the
+# same values whatever was computed before. Each call only streams the candles newer than the last one
+# applied to that series (re-applying that one, it may have changed), and the frame a caller gets back
+# is memoized by its first/last timestamp until the series moves on. A window that slides forward by a
+# candle starts a new series, which is recomputed from its first candle.
+class IndicatorEngine:
+    def __init__(self, series_per_key=SERIES_PER_KEY):
+        self.series_per_key = series_per_key
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _sync(self, symbol, timeframe, df, params):
+        starts = self._series.setdefault((symbol, timeframe, _params_key(params)), OrderedDict())
+        first, last = df.index[0], df.index[-1]
+        series = starts.get(first)
+        if series is None:
+            series = starts[first] = _Series(params)
+            while len(starts) > self.series_per_key:
+                starts.popitem(last=False)
+        starts.move_to_end(first)
+        if series.index and last < series.state.last_ts:
+            # An older frame than the last one seen is served from the stored rows
+            return series
+        new = df.loc[series.state.last_ts:] if series.index else df
+        changed = False
+        candles = new[['open', 'high', 'low', 'close', 'volume']].itertuples(index=False, name=None)
+        for i, (ts, values) in enumerate(zip(new.index, candles)):
+            if series.index and series.index[-1] == ts:
+                if values == series.last_candle:
+                    continue
+                series.index.pop()
+                series.rows.pop()
+            series.index.append(ts)
+            series.rows.append(dict(series.state.update(ts, *values, snapshot=i == len(new) - 1)))
+            series.last_candle = values
+            changed = True
+        if changed:
+            series.views.clear()
+        return series
+
+    # Indicator columns aligned to df's index. The frame is shared between callers: do not modify it.
+    def frame(self, symbol, timeframe, df, params=None):
+        with self._lock:
+            series = self._sync(symbol, timeframe, df, params)
+            view_key = (df.index[0], df.index[-1], len(df))
+            if view_key not in series.views:
+                start = bisect.bisect_left(series.index, df.index[0])
+                end = bisect.bisect_right(series.index, df.index[-1])
+                view = pd.DataFrame(series.rows[start:end], index=pd.DatetimeIndex(series.index[start:end], name=df.index.name),
+                                    columns=INDICATOR_COLUMNS)
+                series.views[view_key] = view if view.index.equals(df.index) else view.reindex(df.index)
+            return series.views[view_key]
+
+    # The indicator values of df's last candle
+    def latest(self, symbol, timeframe, df, params=None):
+        with self._lock:
+            series = self._sync(symbol, timeframe, df, params)
+            position = bisect.bisect_right(series.index, df.index[-1]) - 1
+            return dict(series.rows[position])
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import ccxt
+import ccxt.async_support as ccxt_async
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_DIR = "market_data"
+MARKETS_CACHE_PATH = os.path.join(MARKET_DATA_DIR, "kraken_markets.json")
+# Kraken's market list changes rarely; reload it from the API at most this often
+MARKETS_TTL = 24 * 60 * 60
+# Wait before retrying a market reload that failed (the markets loaded before are kept meanwhile)
+MARKETS_RETRY = 5 * 60
+# Requests allowed back to back before the shared limiter starts spacing them
+RATE_LIMIT_BURST = int(os.getenv("KRAKEN_RATE_LIMIT_BURST", "3"))
+
+
+# Process-wide request spacing shared by every thread (and the async fetcher), so concurrent
+# Streamlit sessions together stay under the exchange limit instead of each keeping its own budget.
+# Requests are spaced `interval` apart on average; up to `burst` may go out back to back, which lets
+# a scan fetch its few timeframes in parallel. Each call reserves its slot under a lock (GCRA), then
+# sleeps until it.
+class RateLimiter:
+    def __init__(self, interval, burst=1):
+        self.interval = interval
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    # Seconds the caller has to wait before its request may go out; cost is ccxt's endpoint weight
+    def reserve(self, cost=None):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval * (1 if cost is None else cost)
+            return max(0.0, slot - (self.burst - 1) * self.interval - now)
+
+    def acquire(self, cost=None):
+        delay = self.reserve(cost)
+        if delay > 0:
+            time.sleep(delay)
+
+
+# ccxt calls throttle() before every REST request, including the ones load_markets makes
+class SharedKraken(ccxt.kraken):
+    def __init__(self, config=None, limiter=None):
+        super().__init__(dict(config or {}, enableRateLimit=True))
+        self.limiter = limiter or RateLimiter(self.rateLimit / 1000, RATE_LIMIT_BURST)
+
+    def throttle(self, cost=None):
+        self.limiter.acquire(cost)
+
+
+# The async client takes its slots from the same limiter, so async and threaded fetches share one budget
+class AsyncSharedKraken(ccxt_async.kraken):
+    def __init__(self, config=None, limiter=None):
+        super().__init__(dict(config or {}, enableRateLimit=True))
+        self.limiter = limiter or RateLimiter(self.rateLimit / 1000, RATE_LIMIT_BURST)
+
+    async def throttle(self, cost=None):
+        delay = self.limiter.reserve(cost)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_lock = threading.Lock()
+_exchange = None
+_markets_fetched_at = 0.0
+
+
+def _load_cached_markets(path=MARKETS_CACHE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - cached.get('fetched_at', 0) > MARKETS_TTL:
+        return None
+    return cached
+
+
+def _reload_markets(exchange):
+    global _markets_fetched_at
+    exchange.load_markets(reload=True)
+    _save_markets(exchange)
+    _markets_fetched_at = time.time()
+    logger.info(f"Loaded {len(exchange.markets)} Kraken markets from the API")
+
+
+def _save_markets(exchange, path=MARKETS_CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'fetched_at': time.time(),
+            'markets': list(exchange.markets.values()),
+            'currencies': exchange.currencies
+        }, f)
+    os.replace(tmp_path, path)
+
+
+# The shared Kraken instance with markets loaded, from the on-disk cache when it is fresh. Once the
+# markets are older than MARKETS_TTL they are reloaded from the API on the next call.
+def get_exchange():
+    global _exchange, _markets_fetched_at
+    with _lock:
+        if _exchange is None:
+            exchange = SharedKraken()
+            cached = _load_cached_markets()
+            if cached:
+                exchange.set_markets(cached['markets'], cached.get('currencies'))
+                _markets_fetched_at = cached['fetched_at']
+            else:
+                _reload_markets(exchange)
+            _exchange = exchange
+        elif time.time() - _markets_fetched_at > MARKETS_TTL:
+            try:
+                _reload_markets(_exchange)
+            except Exception as e:
+                logger.warning(f"Could not reload Kraken markets, keeping the loaded ones: {e}")
+                _markets_fetched_at = time.time() - MARKETS_TTL + MARKETS_RETRY
+        return _exchange
+
+
+# A new async client with the shared limiter and the already loaded markets. It is bound to the event
+# loop it is first used in: create it inside that loop and close() it when done.
+def make_async_exchange():
+    exchange = get_exchange()
+    async_exchange = AsyncSharedKraken(limiter=exchange.limiter)
+    async_exchange.set_markets(list(exchange.markets.values()), exchange.currencies)
+    return async_exchange
+
+
+def fetch_ohlcv(symbol, timeframe='1d', limit=None, since=None):
+    return get_exchange().fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import requests
+import odds_fixtures
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ODDS_API_BASE = "https://api.the-odds-api.com/v4"
+ODDS_DATA_DIR = "odds_data"
+CACHE_DB_PATH = os.path.join(ODDS_DATA_DIR, "odds_cache.db")
+
+# Base cache lifetime in seconds per market; a request for several markets uses the shortest one
+MARKET_TTLS = {
+    'sports': 24 * 60 * 60,
+    'h2h': 5 * 60,
+    'spreads': 5 * 60,
+    'totals': 5 * 60,
+    'outrights': 60 * 60
+}
+DEFAULT_TTL = 5 * 60
+
+# TTL multiplier by the fraction of the Odds API quota still remaining (checked top to bottom)
+QUOTA_TTL_MULTIPLIERS = [(0.5, 1), (0.25, 2), (0.1, 4), (0.02, 8)]
+LOW_QUOTA_TTL_MULTIPLIER = 16
+
+
+# Odds API responses cached in SQLite so they survive restarts, with an in-memory layer so
+# reruns skip the JSON decode. Also tracks the request quota reported in the API's usage headers.
+class OddsCache:
+    def __init__(self, db_path=CACHE_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._memory = {}
+        self._quota = None
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS quota (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    remaining INTEGER,
+                    used INTEGER,
+                    last INTEGER,
+                    updated_at REAL
+                );
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        entry = (json.loads(row[0]), row[1])
+        with self._lock:
+            # Another thread may have stored a newer response in the meantime
+            if key not in self._memory or self._memory[key][1] < entry[1]:
+                self._memory[key] = entry
+            return self._memory[key]
+
+    def put(self, key, payload, fetched_at=None):
+        fetched_at = fetched_at or time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO responses (key, payload, fetched_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET payload = excluded.payload, fetched_at = excluded.fetched_at",
+                    (key, json.dumps(payload), fetched_at)
+                )
+        finally:
+            conn.close()
+        with self._lock:
+            self._memory[key] = (payload, fetched_at)
+        return payload, fetched_at
+
+    def quota(self):
+        if self._quota is None:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT remaining, used, last, updated_at FROM quota WHERE id = 1").fetchone()
+            finally:
+                conn.close()
+            self._quota = dict(zip(('remaining', 'used', 'last', 'updated_at'), row)) if row else {}
+        return self._quota
+
+    # Store x-requests-remaining / x-requests-used / x-requests-last from an Odds API response
+    def record_usage(self, headers):
+        def header_int(name):
+            value = headers.get(name)
+            try:
+                return int(float(value)) if value is not None else None
+            except ValueError:
+                return None
+
+        remaining = header_int('x-requests-remaining')
+        if remaining is None:
+            return
+        quota = {
+            'remaining': remaining,
+            'used': header_int('x-requests-used'),
+            'last': header_int('x-requests-last'),
+            'updated_at': time.time()
+        }
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO quota (id, remaining, used, last, updated_at) VALUES (1, ?, ?, ?, ?)",
+                    (quota['remaining'], quota['used'], quota['last'], quota['updated_at'])
+                )
+        finally:
+            conn.close()
+        self._quota = quota
+
+    def quota_exhausted(self):
+        return self.quota().get('remaining') == 0
+
+    # Lengthen TTLs as the remaining share of the quota drops
+    def ttl_multiplier(self):
+        quota = self.quota()
+        remaining, used = quota.get('remaining'), quota.get('used')
+        if remaining is None or not used:
+            return 1
+        fraction = remaining / (remaining + used)
+        for threshold, multiplier in QUOTA_TTL_MULTIPLIERS:
+            if fraction >= threshold:
+                return multiplier
+        return LOW_QUOTA_TTL_MULTIPLIER
+
+    def ttl_for(self, markets):
+        base = min((MARKET_TTLS.get(m, DEFAULT_TTL) for m in markets), default=DEFAULT_TTL)
+        return base * self.ttl_multiplier()
+
+    # Cached entry for key and whether it is still within the TTL of its markets
+    def lookup(self, key, markets):
+        entry = self.get(key)
+        if entry is None:
+            return None, False
+        fresh = time.time() - entry[1] < self.ttl_for(markets) or self.quota_exhausted()
+        return entry, fresh
+
+
+def request_key(path, params):
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params) if k != 'apiKey')
+    return f"{path}?{query}"
+
+
+def _api_get(api_key, path, params):
+    if odds_fixtures.ODDS_MODE == "replay":
+        return odds_fixtures.replay(path, params)
+    r = requests.get(f"{ODDS_API_BASE}{path}", params=dict(params, apiKey=api_key), timeout=15)
+    if odds_fixtures.ODDS_MODE == "record":
+        odds_fixtures.record(path, params, r)
+    return r
+
+
+# GET an Odds API path through the cache; on errors the last cached payload is served, stale or not
+def fetch_cached(cache, api_key, path, params, markets):
+    key = request_key(path, params)
+    entry, fresh = cache.lookup(key, markets)
+    if fresh:
+        return entry
+    try:
+        r = _api_get(api_key, path, params)
+    except requests.RequestException as e:
+        logger.error(f"Odds API request {path} failed: {e}")
+        return entry or ([], None)
+    cache.record_usage(r.headers)
+    if r.status_code != 200:
+        logger.warning(f"Odds API request {path} returned {r.status_code}: {r.text[:200]}")
+        return entry or ([], None)
+    return cache.put(key, r.json())
+
+
+# --- Odds API endpoints; each returns (payload, fetched_at) ---
+def fetch_sports(api_key, cache):
+    return fetch_cached(cache, api_key, "/sports/", {}, ['sports'])
+
+
+def odds_request(sport_key, markets, regions="eu"):
+    return f"/sports/{sport_key}/odds/", {'regions': regions, 'markets': markets}
+
+
+def fetch_odds(api_key, sport_key, markets, cache, regions="eu"):
+    path, params = odds_request(sport_key, markets, regions)
+    return fetch_cached(cache, api_key, path, params, markets.split(','))
@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+
+# Number of recent price changes kept in memory for the UI
+RECENT_DELTAS = 5000
+
+
+# Key of a single price line: (event, bookmaker, market, outcome, point)
+def line_key(event_id, bookmaker, market, outcome, point=None):
+    return (event_id, bookmaker, market, outcome, point)
+
+
+def iter_lines(events):
+    for event in events:
+        for bookmaker in event.get('bookmakers', []):
+            for market in bookmaker.get('markets', []):
+                for outcome in market['outcomes']:
+                    yield line_key(event['id'], bookmaker['title'], market['key'],
+                                   outcome['name'], outcome.get('point')), outcome['price']
+
+
+# Keeps the last price of every line per sport and turns each new odds poll into a list of changes.
+# Deltas look like {'sport_key', 'event_id', 'bookmaker', 'market', 'outcome', 'point',
+# 'old_price', 'new_price', 'change', 'ts'} where change is 'new', 'moved' or 'removed'.
+class OddsDeltaStore:
+    def __init__(self, recent=RECENT_DELTAS):
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._applied_at = {}
+        self._subscribers = []
+        self.recent = deque(maxlen=recent)
+
+    # callback(sport_key, deltas) is called with every non-empty batch of changes
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def snapshot(self, sport_key):
+        with self._lock:
+            return dict(self._snapshots.get(sport_key, {}))
+
+    # Diff a poll against the stored snapshot. Only markets in the request are checked for removed
+    # lines. Fetch times are tracked per market, so a market whose lines were already applied from the
+    # same or a newer poll (possibly one requesting other markets too) is skipped; the rest still apply.
+    def apply(self, sport_key, events, fetched_at, markets):
+        if fetched_at is None:
+            return []
+        with self._lock:
+            markets = {m for m in markets if fetched_at > self._applied_at.get((sport_key, m), 0)}
+            if not markets:
+                return []
+            for market in markets:
+                self._applied_at[(sport_key, market)] = fetched_at
+            snapshot = self._snapshots.setdefault(sport_key, {})
+            current = {key: price for key, price in iter_lines(events) if key[2] in markets}
+
+            deltas = []
+            for key, price in current.items():
+                old_price = snapshot.get(key)
+                if old_price != price:
+                    deltas.append(self._delta(sport_key, key, old_price, price, 'new' if old_price is None else 'moved', fetched_at))
+                    snapshot[key] = price
+            for key in [k for k in snapshot if k[2] in markets and k not in current]:
+                deltas.append(self._delta(sport_key, key, snapshot.pop(key), None, 'removed', fetched_at))
+            self.recent.extend(deltas)
+
+        if deltas:
+            for callback in self._subscribers:
+                callback(sport_key, deltas)
+        return deltas
+
+    @staticmethod
+    def _delta(sport_key, key, old_price, new_price, change, ts):
+        event_id, bookmaker, market, outcome, point = key
+        return {
+            'sport_key': sport_key,
+            'event_id': event_id,
+            'bookmaker': bookmaker,
+            'market': market,
+            'outcome': outcome,
+            'point': point,
+            'old_price': old_price,
+            'new_price': new_price,
+            'change': change,
+            'ts': ts
+        }
+
+    # Latest price move per line of one event, keyed like line_key
+    def last_moves(self, event_id):
+        with self._lock:
+            return {
+                line_key(d['event_id'], d['bookmaker'], d['market'], d['outcome'], d['point']): d
+                for d in self.recent if d['event_id'] == event_id and d['change'] == 'moved'
+            }
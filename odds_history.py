@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import pandas as pd
+from odds_cache import ODDS_DATA_DIR
+
+HISTORY_DB_PATH = os.path.join(ODDS_DATA_DIR, "odds_history.db")
+
+# Target number of points per series when downsampling for charts
+CHART_POINTS = 300
+# Line ids kept in memory, most recently used first out; older ones are looked up by their line_key
+LINE_ID_CACHE = 50000
+
+
+# Price history of every line, fed by OddsDeltaStore. Each line (event, bookmaker, market, outcome,
+# point) is stored once in `lines`; `prices` only gets a (line_id, ts, price) row when the price
+# changes, clustered by (line_id, ts) so range queries for one event touch only its own rows.
+# A NULL price marks a line that was taken down.
+class OddsHistory:
+    def __init__(self, db_path=HISTORY_DB_PATH, line_id_cache=LINE_ID_CACHE):
+        self.db_path = db_path
+        self.line_id_cache = line_id_cache
+        self._lock = threading.Lock()
+        self._line_ids = OrderedDict()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # One long-lived connection guarded by the lock; closing the last connection to a WAL
+        # database checkpoints it, which would otherwise dominate the cost of every poll
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS lines (
+                    line_id INTEGER PRIMARY KEY,
+                    line_key TEXT NOT NULL UNIQUE,
+                    sport_key TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    bookmaker TEXT NOT NULL,
+                    market TEXT NOT NULL,
+                    outcome TEXT NOT NULL,
+                    point REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_lines_event ON lines (event_id, market, outcome);
+                CREATE TABLE IF NOT EXISTS prices (
+                    line_id INTEGER NOT NULL,
+                    ts REAL NOT NULL,
+                    price REAL,
+                    PRIMARY KEY (line_id, ts)
+                ) WITHOUT ROWID;
+            """)
+
+    @staticmethod
+    def _line_key(delta):
+        return "|".join(str(delta[k]) for k in ('event_id', 'bookmaker', 'market', 'outcome', 'point'))
+
+    # Id of a delta's line, inserting the line on first sight; keys cached here are appended to `added`
+    def _line_id(self, conn, delta, added):
+        key = self._line_key(delta)
+        line_id = self._line_ids.get(key)
+        if line_id is not None:
+            self._line_ids.move_to_end(key)
+        else:
+            conn.execute(
+                "INSERT OR IGNORE INTO lines (line_key, sport_key, event_id, bookmaker, market, outcome, point) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, delta['sport_key'], delta['event_id'], delta['bookmaker'], delta['market'],
+                 delta['outcome'], delta['point'])
+            )
+            line_id = conn.execute("SELECT line_id FROM lines WHERE line_key = ?", (key,)).fetchone()[0]
+            self._line_ids[key] = line_id
+            added.append(key)
+            if len(self._line_ids) > self.line_id_cache:
+                self._line_ids.popitem(last=False)
+        return line_id
+
+    # OddsDeltaStore subscriber: append one poll's changes. If the transaction fails, the ids cached
+    # for it are dropped too, as their lines may have been rolled back.
+    def record(self, sport_key, deltas):
+        added = []
+        with self._lock:
+            try:
+                with self._conn:
+                    rows = [(self._line_id(self._conn, d, added), d['ts'], d['new_price']) for d in deltas]
+                    self._conn.executemany("INSERT OR REPLACE INTO prices (line_id, ts, price) VALUES (?, ?, ?)", rows)
+            except Exception:
+                for key in added:
+                    self._line_ids.pop(key, None)
+                raise
+
+    def event_lines(self, event_id):
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT line_id, bookmaker, market, outcome, point FROM lines WHERE event_id = ?",
+                self._conn, params=(event_id,)
+            )
+
+    # Change points of an event's lines in [start, end] (epoch seconds), plus each line's last price
+    # before start. With bucket (seconds) only the last change per line and bucket is returned, so
+    # long ranges are downsampled inside SQLite instead of in memory.
+    def query(self, event_id, market=None, outcome=None, start=None, end=None, bucket=None):
+        lines = self.event_lines(event_id)
+        if market is not None:
+            lines = lines[lines['market'] == market]
+        if outcome is not None:
+            lines = lines[lines['outcome'] == outcome]
+        if lines.empty:
+            return pd.DataFrame(columns=['ts', 'bookmaker', 'market', 'outcome', 'point', 'price'])
+
+        ids = ",".join(str(i) for i in lines['line_id'])
+        start = start if start is not None else 0
+        end = end if end is not None else float('inf')
+        if bucket:
+            in_range = (f"SELECT line_id, MAX(ts) AS ts, price FROM prices WHERE line_id IN ({ids}) "
+                        f"AND ts >= ? AND ts <= ? GROUP BY line_id, CAST(ts / {float(bucket)} AS INTEGER)")
+        else:
+            in_range = f"SELECT line_id, ts, price FROM prices WHERE line_id IN ({ids}) AND ts >= ? AND ts <= ?"
+        before = f"SELECT line_id, MAX(ts) AS ts, price FROM prices WHERE line_id IN ({ids}) AND ts < ? GROUP BY line_id"
+        with self._lock:
+            points = pd.read_sql_query(f"{in_range} UNION ALL {before}", self._conn, params=(start, end, start))
+        points = points.merge(lines, on='line_id').drop(columns='line_id')
+        return points.sort_values('ts')[['ts', 'bookmaker', 'market', 'outcome', 'point', 'price']]
+
+    # Wide price series for one outcome, one column per bookmaker, forward-filled between changes
+    def price_series(self, event_id, market, outcome, start=None, end=None, points=CHART_POINTS):
+        bounds = self._time_bounds(event_id)
+        if bounds is None:
+            return pd.DataFrame()
+        start = start if start is not None else bounds[0]
+        end = end if end is not None else bounds[1]
+        bucket = max((end - start) / points, 1.0)
+        history = self.query(event_id, market, outcome, start, end, bucket=bucket)
+        if history.empty:
+            return pd.DataFrame()
+        history['series'] = history['bookmaker'] + history['point'].map(lambda p: "" if pd.isna(p) else f" ({p:+g})")
+        history['time'] = pd.to_datetime(history['ts'].clip(lower=start), unit='s')
+        # Removed lines carry a NULL price; keep them as gaps rather than forward-filling over them
+        history['price'] = history['price'].fillna(-1.0)
+        wide = history.drop_duplicates(['time', 'series'], keep='last').pivot(index='time', columns='series', values='price')
+        return wide.ffill().mask(lambda df: df < 0)
+
+    def _time_bounds(self, event_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(p.ts), MAX(p.ts) FROM prices p JOIN lines l ON l.line_id = p.line_id WHERE l.event_id = ?",
+                (event_id,)
+            ).fetchone()
+        return row if row and row[0] is not None else None
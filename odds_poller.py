@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import httpx
+import odds_fixtures
+from odds_cache import ODDS_API_BASE, request_key, odds_request
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# httpx logs every request URL at INFO, which would include the API key
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Sports always kept warm, e.g. ODDS_POLL_SPORTS="soccer_epl,basketball_nba"; sports viewed in the
+# app are added on demand and dropped again after WATCH_EXPIRY seconds without a view
+POLL_SPORTS = [s for s in os.getenv("ODDS_POLL_SPORTS", "").split(",") if s]
+POLL_MARKETS = os.getenv("ODDS_POLL_MARKETS", "h2h")
+POLL_INTERVAL = float(os.getenv("ODDS_POLL_INTERVAL", "30"))
+POLL_CONCURRENCY = int(os.getenv("ODDS_POLL_CONCURRENCY", "4"))
+WATCH_EXPIRY = 30 * 60
+
+SPORTS_TARGET = ("/sports/", {}, ['sports'])
+
+
+# Background thread running an asyncio loop that keeps the OddsCache fresh for a set of
+# (sport, markets) targets. Each cycle refetches only targets whose cache TTL has expired, concurrently
+# over one pooled httpx client, and feeds new responses to the delta store. Streamlit sessions read
+# the cache and never wait on the Odds API.
+class OddsPoller:
+    def __init__(self, api_key, cache, delta_store=None, sports=POLL_SPORTS, markets=POLL_MARKETS,
+                 interval=POLL_INTERVAL, concurrency=POLL_CONCURRENCY):
+        self.api_key = api_key
+        self.cache = cache
+        self.delta_store = delta_store
+        self.interval = interval
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._pinned = {(sport, markets) for sport in sports}
+        self._watched = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_cycle = None
+
+    # Keep (sport_key, markets) fresh; called by the app every time a sport is viewed
+    def watch(self, sport_key, markets):
+        with self._lock:
+            self._watched[(sport_key, markets)] = time.time()
+
+    def targets(self):
+        now = time.time()
+        with self._lock:
+            for target in [t for t, seen in self._watched.items() if now - seen > WATCH_EXPIRY]:
+                del self._watched[target]
+            return self._pinned | set(self._watched)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name="odds-poller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    async def _run(self):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=ODDS_API_BASE, timeout=15, limits=limits) as client:
+            while not self._stop.is_set():
+                try:
+                    await self.poll_once(client)
+                except Exception as e:
+                    logger.error(f"Odds poll cycle failed: {e}")
+                # Sleep on the loop rather than in a worker thread: executor threads are joined at
+                # interpreter exit, so waiting on the stop event there would block shutdown
+                deadline = time.monotonic() + self.interval
+                while not self._stop.is_set() and time.monotonic() < deadline:
+                    await asyncio.sleep(min(1.0, deadline - time.monotonic()))
+
+    # One cycle: fetch every due target concurrently
+    async def poll_once(self, client):
+        requests_due = [SPORTS_TARGET] if not self.cache.lookup(request_key(*SPORTS_TARGET[:2]), ['sports'])[1] else []
+        for sport_key, markets in self.targets():
+            path, params = odds_request(sport_key, markets)
+            if not self.cache.lookup(request_key(path, params), markets.split(','))[1]:
+                requests_due.append((path, params, markets.split(','), sport_key))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._fetch(client, semaphore, *request) for request in requests_due))
+        self.last_cycle = time.time()
+
+    async def _fetch(self, client, semaphore, path, params, markets, sport_key=None):
+        async with semaphore:
+            try:
+                if odds_fixtures.ODDS_MODE == "replay":
+                    r = odds_fixtures.replay(path, params)
+                else:
+                    r = await client.get(path, params=dict(params, apiKey=self.api_key))
+            except httpx.HTTPError as e:
+                logger.error(f"Odds API request {path} failed: {e}")
+                return
+        if odds_fixtures.ODDS_MODE == "record":
+            await asyncio.to_thread(odds_fixtures.record, path, params, r)
+        self.cache.record_usage(r.headers)
+        if r.status_code != 200:
+            logger.warning(f"Odds API request {path} returned {r.status_code}: {r.text[:200]}")
+            return
+        payload, fetched_at = await asyncio.to_thread(self.cache.put, request_key(path, params), r.json())
+        if self.delta_store is not None and sport_key is not None:
+            await asyncio.to_thread(self.delta_store.apply, sport_key, payload, fetched_at, markets)
@@ -0,0 +1,89 @@
+import os
+import pandas as pd
+
+# Upper bound on the size of the match summary sent to the LLM, in (estimated) tokens
+SUMMARY_TOKEN_BUDGET = int(os.getenv("ODDS_SUMMARY_TOKENS", "800"))
+# Value bets listed ahead of the market overview
+SUMMARY_VALUE_BETS = 10
+
+
+# Rough token count for Llama-style tokenizers on this kind of text (~4 characters per token)
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def _outcome_label(market, outcome, point):
+    if pd.isna(point):
+        return outcome
+    return f"{outcome} {point:g}" if market == 'totals' else f"{outcome} {point:+g}"
+
+
+# Best / median / worst price and bookmaker count per (market, outcome, point) of one event's rows
+# from the normalized odds table. Within a market the most widely offered lines come first, so the
+# main spread/total survives truncation ahead of alternates.
+def price_ranges(rows):
+    if rows.empty:
+        return pd.DataFrame(columns=['market', 'outcome', 'point', 'best', 'best_bookmaker', 'median', 'worst', 'books'])
+    rows = rows.assign(point_key=rows['point'].fillna(float('inf')))
+    grouped = rows.groupby(['market', 'outcome', 'point_key'], observed=True, sort=False)
+    ranges = grouped['price'].agg(best='max', median='median', worst='min', books='size')
+    ranges['best_bookmaker'] = rows.loc[grouped['price'].idxmax(), 'bookmaker'].astype(str).to_numpy()
+    ranges = ranges.reset_index()
+    ranges['point'] = ranges['point_key'].where(ranges['point_key'] != float('inf'))
+    line_books = ranges.groupby(['market', 'point_key'], observed=True)['books'].transform('max')
+    order = ranges.assign(line_books=line_books).sort_values(['market', 'line_books'], ascending=[True, False], kind='stable')
+    return order[['market', 'outcome', 'point', 'best', 'best_bookmaker', 'median', 'worst', 'books']]
+
+
+# Compact AI prompt context for one match: header, the ranked value bets, then one line per outcome
+# with the price range across bookmakers. Lines are added in priority order until the token budget
+# is reached; whatever does not fit is reported as omitted rather than cut mid-line, and a section
+# heading is only kept together with the first line under it.
+def build_match_summary(event, sport_title, rows, value_bets=None, max_tokens=SUMMARY_TOKEN_BUDGET):
+    header = [
+        f"Match: {event['home_team']} vs {event['away_team']}",
+        f"Sport: {sport_title}",
+    ]
+    if event.get('commence_time'):
+        header.append(f"Kick-off: {event['commence_time']}")
+    header.append(f"Bookmakers: {rows['bookmaker'].nunique()}")
+
+    # (line, is_heading) in priority order
+    body = []
+    if value_bets is not None and not value_bets.empty:
+        body.append(("Value bets (price above the margin-free consensus of the other bookmakers):", True))
+        body.extend(
+            (f"  {r.bookmaker} {r.market} {_outcome_label(r.market, r.outcome, r.point)}: {r.price:g} vs fair "
+             f"{r.fair_price:.2f} (edge {r.edge:+.1%}, {r.books} books)", False)
+            for r in value_bets.head(SUMMARY_VALUE_BETS).itertuples()
+        )
+
+    body.append(("Odds (best / median / worst across bookmakers):", True))
+    market = None
+    for r in price_ranges(rows).itertuples():
+        if r.market != market:
+            market = r.market
+            body.append((f"  Market: {market}", True))
+        body.append((
+            f"    {_outcome_label(r.market, r.outcome, r.point)}: best {r.best:g} ({r.best_bookmaker}), "
+            f"median {r.median:.2f}, worst {r.worst:g}, {r.books} books", False
+        ))
+
+    lines = list(header)
+    used = estimate_tokens("\n".join(lines))
+    for i, (line, is_heading) in enumerate(body):
+        cost = estimate_tokens(line)
+        if is_heading:
+            # Headings only go in if the line they introduce (after any nested headings) fits too
+            end = next((j for j in range(i, len(body)) if not body[j][1]), None)
+            if end is None:
+                break
+            cost = sum(estimate_tokens(text) for text, _ in body[i:end + 1])
+        if used + cost > max_tokens:
+            omitted = sum(1 for _, heading in body[i:] if not heading)
+            if omitted:
+                lines.append(f"... {omitted} more lines omitted")
+            break
+        lines.append(line)
+        used += estimate_tokens(line)
+    return "\n".join(lines)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the normalized odds table; one row per (event, bookmaker, market, outcome, point)
+ODDS_TABLE_COLUMNS = ['event_id', 'bookmaker', 'market', 'outcome', 'point', 'price']
+
+
+# Flatten a whole get_odds response in one pass into a columnar table. Labels are categoricals, so
+# the table stays small and filters/groupbys run on integer codes; point is NaN for markets without one.
+# Labels are coded while walking the JSON, so the table is built from one numeric array instead of
+# factorizing object columns afterwards. Rows keep the response order, so each event is a contiguous row range.
+def normalize_odds(events):
+    event_codes, bookmakers, markets, outcomes = {}, {}, {}, {}
+    for event in events:
+        event_codes.setdefault(event['id'], len(event_codes))
+    rows = [
+        (event_codes[event['id']],
+         bookmakers.setdefault(bookmaker['title'], len(bookmakers)),
+         markets.setdefault(market['key'], len(markets)),
+         outcomes.setdefault(outcome['name'], len(outcomes)),
+         outcome.get('point', np.nan), outcome['price'])
+        for event in events
+        for bookmaker in event.get('bookmakers', [])
+        for market in bookmaker.get('markets', [])
+        for outcome in market['outcomes']
+    ]
+    values = np.array(rows, dtype=float).reshape(-1, len(ODDS_TABLE_COLUMNS))
+    codes = values[:, :4].astype(np.int64)
+    return pd.DataFrame({
+        'event_id': pd.Categorical.from_codes(codes[:, 0], categories=list(event_codes)),
+        'bookmaker': pd.Categorical.from_codes(codes[:, 1], categories=list(bookmakers)),
+        'market': pd.Categorical.from_codes(codes[:, 2], categories=list(markets)),
+        'outcome': pd.Categorical.from_codes(codes[:, 3], categories=list(outcomes)),
+        'point': values[:, 4],
+        'price': values[:, 5]
+    })
+
+
+# Normalized odds of one response, built once per payload and shared by every view of it. Per-event
+# views are positional slices found by binary search on the event codes instead of full-table scans.
+class OddsTable:
+    def __init__(self, events):
+        self.frame = normalize_odds(events)
+        codes = self.frame['event_id'].cat.codes.to_numpy()
+        # Duplicate event ids in a response would break the contiguous ranges; fall back to masks then
+        self._sorted = bool((np.diff(codes) >= 0).all())
+        self._codes = codes
+        self._categories = {event_id: i for i, event_id in enumerate(self.frame['event_id'].cat.categories)}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def event(self, event_id, markets=None):
+        code = self._categories.get(event_id)
+        if code is None:
+            rows = self.frame.iloc[:0]
+        elif self._sorted:
+            rows = self.frame.iloc[np.searchsorted(self._codes, code, 'left'):np.searchsorted(self._codes, code, 'right')]
+        else:
+            rows = self.frame[self._codes == code]
+        if markets is not None:
+            rows = rows[rows['market'].isin(markets)]
+        return rows
+
+
+# Odds table shown for one event: table rows plus a ▲/▼ marker for lines that moved since the
+# previous poll (moves as returned by OddsDeltaStore.last_moves)
+def odds_display_frame(rows, moves):
+    move_labels = {
+        key[1:]: f"{'▲' if m['new_price'] > m['old_price'] else '▼'} from {m['old_price']}" for key, m in moves.items()
+    }
+    points = rows['point'].astype(object).where(rows['point'].notna(), None)
+    return pd.DataFrame({
+        'Bookmaker': rows['bookmaker'].to_numpy(),
+        'Market': rows['market'].to_numpy(),
+        'Outcome': rows['outcome'].to_numpy(),
+        'Odds': rows['price'],
+        'Move': [move_labels.get(key, "") for key in zip(rows['bookmaker'], rows['market'], rows['outcome'], points)]
+    }).reset_index(drop=True)
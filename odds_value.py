@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# A price is flagged when its expected value against the consensus is at least MIN_EDGE per unit
+# staked and at least MIN_BOOKS other bookmakers price the same outcome
+MIN_EDGE = 0.02
+MIN_BOOKS = 3
+
+VALUE_COLUMNS = ['event_id', 'market', 'outcome', 'point', 'bookmaker', 'price', 'fair_price',
+                 'consensus_prob', 'edge', 'books']
+
+
+# Implied and margin-free probabilities per row of a normalized odds table (see odds_table.py).
+# A bookmaker's market is the set of its outcomes for one event, market and line; spreads pair
+# +x/-x, so the line is the absolute point. The margin is removed proportionally: each implied
+# probability is divided by the market's overround. Markets with fewer than two outcomes are dropped.
+def fair_probabilities(frame):
+    frame = frame[frame['price'] > 1.0]
+    line = frame['point'].abs().fillna(-1.0)
+    implied = 1.0 / frame['price'].to_numpy()
+    book_market = [frame['event_id'], frame['bookmaker'], frame['market'], line]
+    grouped = pd.Series(implied, index=frame.index).groupby(book_market, observed=True)
+    overround = grouped.transform('sum').to_numpy()
+    outcomes = grouped.transform('size').to_numpy()
+    result = frame.assign(implied_prob=implied, overround=overround, fair_prob=implied / overround)
+    return result[outcomes >= 2]
+
+
+# Leave-one-out consensus: every price is compared with the mean fair probability of the *other*
+# bookmakers on the same outcome, so a single outlier cannot move its own benchmark.
+def consensus(frame):
+    fair = fair_probabilities(frame)
+    outcome_key = [fair['event_id'], fair['market'], fair['outcome'], fair['point'].fillna(np.inf)]
+    grouped = fair['fair_prob'].groupby(outcome_key, observed=True)
+    total = grouped.transform('sum').to_numpy()
+    books = grouped.transform('size').to_numpy()
+    others = books - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        consensus_prob = np.where(others > 0, (total - fair['fair_prob'].to_numpy()) / others, np.nan)
+    return fair.assign(
+        consensus_prob=consensus_prob,
+        fair_price=1.0 / consensus_prob,
+        edge=fair['price'].to_numpy() * consensus_prob - 1.0,
+        books=others
+    )
+
+
+# Prices beating the consensus fair price, best edge first, for every event in the table at once
+def find_value_bets(frame, min_edge=MIN_EDGE, min_books=MIN_BOOKS):
+    priced = consensus(frame)
+    value = priced[(priced['edge'] >= min_edge) & (priced['books'] >= min_books)]
+    return value.sort_values('edge', ascending=False)[VALUE_COLUMNS].reset_index(drop=True)
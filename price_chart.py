@@ -0,0 +1,62 @@
+import io
+import numpy as np
+from matplotlib.figure import Figure
+
+# Points per line drawn; longer series are downsampled for display
+CHART_MAX_POINTS = 600
+
+
+# Positions to draw so that at most about max_points remain: the series is cut into equal buckets
+# and each keeps its lowest and highest value (in time order), so spikes survive the downsampling
+def downsample_positions(values, max_points=CHART_MAX_POINTS):
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    bucket = -(-n // (max_points // 2))
+    starts = np.arange(0, n, bucket)
+    padded = np.full(len(starts) * bucket, np.nan)
+    padded[:n] = values
+    windows = padded.reshape(len(starts), bucket)
+    lows = starts + np.nanargmin(windows, axis=1)
+    highs = starts + np.nanargmax(windows, axis=1)
+    return np.unique(np.concatenate((lows, highs, [n - 1])))
+
+
+# Candles (with their indicator columns) to draw, downsampled on the close
+def chart_frame(ohlcv, max_points=CHART_MAX_POINTS):
+    return ohlcv.iloc[downsample_positions(ohlcv['close'].to_numpy(dtype=float), max_points)]
+
+
+# The price / RSI / MACD figure of the main page as PNG bytes. Built on a standalone Figure rather
+# than pyplot, so concurrent sessions do not share pyplot's current-figure state.
+def render_price_chart(symbol, timeframe, frame, fib_levels, candles):
+    fig = Figure(figsize=(10, 8))
+    ax1, ax2, ax3 = fig.subplots(3, 1, gridspec_kw={'height_ratios': [3, 1, 1]})
+    frame['close'].plot(ax=ax1, label='Close', color='blue')
+    if frame['MA20'].notnull().any():
+        frame['MA20'].plot(ax=ax1, label='MA20', color='orange')
+    if frame['MA50'].notnull().any():
+        frame['MA50'].plot(ax=ax1, label='MA50', color='green')
+    if frame['BB_upper'].notnull().any():
+        frame['BB_upper'].plot(ax=ax1, label='BB Upper', color='red', linestyle='--')
+        frame['BB_lower'].plot(ax=ax1, label='BB Lower', color='red', linestyle='--')
+    for level, price in fib_levels.items():
+        ax1.axhline(price, linestyle='--', alpha=0.5, label=f'Fib {level}')
+    ax1.set_title(f"{symbol} Price Chart ({candles} candles, {timeframe})")
+    ax1.set_ylabel("Price")
+    ax1.legend()
+    frame['RSI'].plot(ax=ax2, label='RSI', color='purple')
+    ax2.axhline(70, color='red', linestyle='--')
+    ax2.axhline(30, color='green', linestyle='--')
+    ax2.set_title("RSI (14)")
+    ax2.legend()
+    frame['MACD'].plot(ax=ax3, label='MACD', color='blue')
+    frame['MACDs'].plot(ax=ax3, label='Signal', color='orange')
+    # One line collection instead of a bar patch per candle
+    ax3.vlines(frame.index, 0, frame['MACDh'], color='gray', alpha=0.3, linewidth=2, label='Histogram')
+    ax3.set_title("MACD")
+    ax3.legend()
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from confluence import SCAN_TIMEFRAMES, confluence_signal, score_timeframe
+from indicators import IndicatorEngine
+from kraken_client import make_async_exchange
+
+logger = logging.getLogger(__name__)
+
+# Symbols whose candles are loaded at the same time; their requests are still spaced by the shared limiter
+SCREEN_CONCURRENCY = int(os.getenv("SCREEN_CONCURRENCY", "8"))
+SCREEN_WORKERS = min(4, os.cpu_count() or 1)
+SCREEN_LIMIT = 90
+
+# Indicator state of the worker process (each worker keeps the series of the symbols it scored)
+_engine = IndicatorEngine()
+
+
+# Workers are spawned rather than forked: forking the multi-threaded Streamlit server can leave a
+# lock held in the child
+def make_process_pool(workers=SCREEN_WORKERS):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+# Confluence score of one symbol from its candles per timeframe (runs in a worker process). Like the
+# single-symbol scan, a timeframe that cannot be scored counts as 0.
+def score_symbol(symbol, frames, timeframes=SCAN_TIMEFRAMES):
+    row = {'Symbol': symbol}
+    for tf in timeframes:
+        df = frames.get(tf)
+        try:
+            row[tf] = score_timeframe(tf, df, _engine.latest(symbol, tf, df))[2] if df is not None else 0
+        except Exception as e:
+            logger.error(f"Error screening {symbol} {tf}: {e}")
+            row[tf] = 0
+    row['Score'] = sum(row[tf] for tf in timeframes)
+    row['Signal'] = confluence_signal(row['Score'])
+    last = next((frames[tf] for tf in reversed(timeframes) if frames.get(tf) is not None and not frames[tf].empty), None)
+    row['Price'] = last['close'].iloc[-1] if last is not None else float('nan')
+    return row
+
+
+def rank_rows(rows, timeframes=SCAN_TIMEFRAMES):
+    ranking = pd.DataFrame(rows, columns=['Symbol', 'Score', 'Signal', 'Price', *timeframes])
+    return ranking.sort_values('Score', ascending=False, ignore_index=True)
+
+
+async def _screen(store, symbols, timeframes, limit, pool, on_progress):
+    exchange = make_async_exchange()
+    semaphore = asyncio.Semaphore(SCREEN_CONCURRENCY)
+    rows, errors = [], {}
+
+    # One task per symbol loads its timeframes in order, so the base timeframe fetched for the first
+    # one is reused by the ones derived from it; scoring goes to the process pool
+    async def screen_symbol(symbol):
+        frames = {}
+        async with semaphore:
+            for tf in timeframes:
+                try:
+                    frames[tf] = await store.aget(symbol, tf, limit, exchange.fetch_ohlcv)
+                except Exception as e:
+                    logger.error(f"Error loading {symbol} {tf}: {e}")
+                    errors[symbol] = str(e)
+        if not frames:
+            return None
+        return await asyncio.wrap_future(pool.submit(score_symbol, symbol, frames, timeframes))
+
+    try:
+        for done, task in enumerate(asyncio.as_completed([screen_symbol(s) for s in symbols]), start=1):
+            try:
+                row = await task
+            except Exception as e:
+                logger.error(f"Error scoring: {e}")
+                row = None
+            if row is not None:
+                rows.append(row)
+            if on_progress:
+                on_progress(done, len(symbols), rows)
+    finally:
+        await exchange.close()
+    return rows, errors
+
+
+# Confluence ranking of every symbol (highest score first) plus {symbol: error} for symbols whose
+# candles could not all be loaded. Candles come from the candle store, so repeated screens only
+# download what is new. on_progress(done, total, rows) is called as each symbol finishes.
+def screen_market(store, symbols, timeframes=SCAN_TIMEFRAMES, limit=SCREEN_LIMIT, pool=None, on_progress=None):
+    own_pool = pool is None
+    pool = pool or make_process_pool()
+    try:
+        rows, errors = asyncio.run(_screen(store, symbols, timeframes, limit, pool, on_progress))
+    finally:
+        if own_pool:
+            pool.shutdown()
+    return rank_rows(rows, timeframes), errors